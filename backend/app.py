@@ -1,9 +1,11 @@
 import base64
-from flask import Flask, request, jsonify
+import functools
+import json
+import re
+from flask import Flask, Response, make_response, request, jsonify
 from flask_cors import CORS
 from info_retriever import (
     get_top_thirteen_f,
-    get_earnings_report,
     get_all_filings,
     get_benzinga_news,
     get_yahoo_news
@@ -13,21 +15,25 @@ import datetime as dt
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-import yfinance as yf
-from functools import lru_cache
 from dotenv import load_dotenv
 load_dotenv()
 import os
 import cohere
-import openai
-import hnswlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Union
-from tqdm import tqdm
-from unstructured.partition.html import partition_html
-from unstructured.chunking.title import chunk_by_title
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from config import config
 from autogen_creator import write_algorithm
+from vectorstore import Vectorstore, GENERAL_NAMESPACE
+from ingestion import IngestionPipeline
+from refresh_scheduler import RefreshScheduler
+from ticker_resolver import resolve_ticker, get_resolver
+from price_store import price_store
+from financials_store import create_store as create_financials_store, DEFAULT_PERIODS, FinancialsUnavailable
+from serialization import format_bars, serialize_bars, serialize_bars_batch
+from response_cache import cached_endpoint, response_cache, seconds_until_market_close, MINUTE, DAY
+from query_cache import SemanticCache
+from context_builder import build_context
 # from sklearn.preprocessing import MinMaxScaler
 # from keras.models import Sequential
 # from keras.layers import Dense, LSTM
@@ -35,15 +41,111 @@ from autogen_creator import write_algorithm
 COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 SAMBA_API = os.getenv("SAMBA_API")
+# Overridable so /chat can be pointed at benchmarks/fake_llm_server.py
+PERPLEXITY_BASE_URL = os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "llama-3.1-sonar-large-128k-online")
+
+SAMBA_BASE_URL = "https://api.sambanova.ai/v1"
 
 co = cohere.Client(COHERE_API_KEY)
-perclient = openai.OpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perplexity.ai")
-samba = openai.OpenAI(api_key=SAMBA_API, base_url="https://api.sambanova.ai/v1")
+
+# openai takes a while to import, so its clients are created on first use
+_openai_clients = {}
+_openai_clients_lock = threading.Lock()
+
+def openai_client(base_url, api_key):
+    with _openai_clients_lock:
+        client = _openai_clients.get(base_url)
+        if client is None:
+            import openai
+
+            client = _openai_clients[base_url] = openai.OpenAI(api_key=api_key, base_url=base_url)
+    return client
+
+def perplexity_client():
+    return openai_client(PERPLEXITY_BASE_URL, PERPLEXITY_API_KEY)
+
+def samba_client():
+    return openai_client(SAMBA_BASE_URL, SAMBA_API)
 
 app = Flask(__name__)
 CORS(app)
 
-embedded_stocks = []
+# Slow endpoints (LLM completions, algorithm generation) may hold at most this many
+# request threads at once, so fast endpoints like /stock_data always have threads to run on.
+# Keep it below the server's thread count (SERVER_THREADS in asgi.py).
+SLOW_REQUEST_SLOTS = int(os.getenv("SLOW_REQUEST_SLOTS", "16"))
+SLOW_REQUEST_WAIT_SECONDS = float(os.getenv("SLOW_REQUEST_WAIT_SECONDS", "0"))
+slow_request_slots = threading.BoundedSemaphore(SLOW_REQUEST_SLOTS)
+
+class ReleasingStream:
+    """
+    Wraps a streamed response body and calls release exactly once: when the body is
+    exhausted, when reading it raises, or when it is closed, whichever comes first.
+    uvicorn's WSGIMiddleware reads the body to the end but never closes it, while
+    Werkzeug closes it without reading on when the client goes away.
+    """
+
+    def __init__(self, body, release):
+        self.body = body
+        self.chunks = iter(body)
+        self._release = release
+        self._released = False
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.chunks)
+        except BaseException:
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._release()
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.release()
+
+
+def slow_endpoint(view):
+    """
+    Runs a view in one of the slow request slots, answering 503 when none frees up in time.
+    A streamed response keeps its slot until the stream ends.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not slow_request_slots.acquire(timeout=SLOW_REQUEST_WAIT_SECONDS):
+            response = jsonify({"error": "Server busy, try again shortly"})
+            response.status_code = 503
+            response.headers["Retry-After"] = "5"
+            return response
+        try:
+            response = make_response(view(*args, **kwargs))
+        except BaseException:
+            slow_request_slots.release()
+            raise
+        if not response.is_streamed:
+            slow_request_slots.release()
+            return response
+
+        # Not a finally block in the body: that would not run if the response is closed
+        # before the first chunk is read, and close() alone is not called by every server
+        response.response = ReleasingStream(response.response, slow_request_slots.release)
+        return response
+
+    return wrapper
+
 print("Starting the server...")
 
 
@@ -52,17 +154,38 @@ def top_thirteen_f():
     holdings = get_top_thirteen_f()
     return jsonify(holdings)
 
-@lru_cache(maxsize=32)
+# Parsed statements are kept locally, so only a period's first request goes to EDGAR
+financials_store = create_financials_store()
+
 @app.route('/earnings_report', methods=['GET', 'POST'])
 def earnings_report():
     ticker = request.args.get('ticker')
     year = int(request.args.get('year'))
     quarter = int(request.args.get('quarter'))
-    financials = get_earnings_report(ticker, year, quarter)
+    try:
+        financials = financials_store.report(ticker, year, quarter)
+    except FinancialsUnavailable as e:
+        return jsonify({"error": str(e)}), 502
+    if financials is None:
+        return jsonify({"error": f"No {'10-K' if quarter == 4 else '10-Q'} filed by {ticker} in {year} Q{quarter}"}), 404
     return jsonify(financials)
 
-@lru_cache(maxsize=32)
+@app.route('/financials', methods=['GET'])
+def financials():
+    """
+    Statements of a ticker's latest 10-Q/10-K filings, e.g. /financials?ticker=AAPL&periods=8.
+    """
+    ticker = request.args.get('ticker', '').strip().upper()
+    periods = int(request.args.get('periods', DEFAULT_PERIODS))
+    if not ticker:
+        return jsonify({"error": "ticker is required"}), 400
+    try:
+        return jsonify({"ticker": ticker, "periods": financials_store.latest(ticker, periods)})
+    except FinancialsUnavailable as e:
+        return jsonify({"error": str(e)}), 502
+
 @app.route('/all_filings', methods=['GET', 'POST'])
+@cached_endpoint(ttl=3 * DAY)
 def all_filings():
     ticker = request.args.get('ticker')
     start_date = request.args.get('start_date')
@@ -74,8 +197,8 @@ def all_filings():
     filings = get_all_filings(ticker, start_date, end_date)
     return jsonify(filings)
 
-@lru_cache(maxsize=32)
 @app.route('/benzinga_news', methods=['GET', 'POST'])
+@cached_endpoint(ttl=5 * MINUTE)
 def benzinga_news():
     tickers = request.args.get('tickers').split(',')
     start_date = request.args.get('start_date')
@@ -83,223 +206,391 @@ def benzinga_news():
     news = get_benzinga_news(tickers, start_date, end_date)
     return jsonify(news)
 
-@lru_cache(maxsize=32)
 @app.route('/yahoo_news', methods=['GET', 'POST'])
+@cached_endpoint(ttl=5 * MINUTE)
 def yahoo_news():
     ticker = request.args.get('ticker')
     news = get_yahoo_news(ticker)
     return jsonify(news)
 
-@lru_cache(maxsize=32)
 @app.route('/stock_data', methods=['GET', 'POST'])
+@cached_endpoint(ttl=seconds_until_market_close, vary=("Accept",))
 def stock_data():
     ticker = request.args.get('ticker')
     end_date = dt.datetime.now().date()
     start_date = end_date - dt.timedelta(days=365*5)
-    loaded_data = yf.download(tickers=ticker, start=start_date, end=end_date)
+    loaded_data = price_store.get(ticker, start_date, end_date)
     
-    # Convert the DataFrame to a dictionary with date strings as keys
-    data_dict = loaded_data.reset_index().to_dict('records')
-    formatted_data = [{
-        'date': record['Date'].strftime('%Y-%m-%d'),
-        'open': record['Open'],
-        'high': record['High'],
-        'low': record['Low'],
-        'price': int(record['Close']*100)/100,
-        'volume': record['Volume']
-    } for record in data_dict]
+    # Formatted column-wise; ?shape=columnar or an Arrow Accept header pick a more compact payload
+    bars = format_bars(loaded_data)
+    body, content_type = serialize_bars(bars, shape=request.args.get('shape', 'records'), accept=request.headers.get('Accept', ''))
     
-    return jsonify(formatted_data)
-
-class Vectorstore:
-    def __init__(self, documents: List[Union[Dict[str, str], str]] = None):
-        self.documents = documents or []
-        self.docs = []
-        self.docs_embs = []
-        self.retrieve_top_k = 10
-        self.rerank_top_k = 3
-        self.idx = None
-        
-        if self.documents:
-            self.process_documents()
-            self.embed()
-            self.index()
-
-    def process_documents(self, new_documents: List[Union[Dict[str, str], str]] = None) -> List[Dict[str, str]]:
-        """
-        Processes documents, handling both URL-based and direct text input.
-        """
-        documents_to_process = new_documents or self.documents
-        print("Processing documents...")
-        
-        def process_document(document):
-            if isinstance(document, str):
-                return [{"title": "Direct Text", "text": document, "url": None}]
-            elif isinstance(document, dict) and "url" in document:
-                try:
-                    elements = partition_html(url=document["url"], headers={"User-Agent": "ks@gatech.edu"})
-                    chunks = chunk_by_title(elements)
-                    return [
-                        {
-                            "title": document.get("title", "Untitled"),
-                            "text": str(chunk),
-                            "url": document["url"],
-                        }
-                        for chunk in chunks
-                    ]
-                except Exception as e:
-                    print(f"Error loading document: {e}")
-                    return []
-            else:
-                print(f"Unsupported document format: {document}", end="\n")
-                return []
-
-        new_docs = []
-        with ThreadPoolExecutor() as executor:
-            future_to_doc = {executor.submit(process_document, doc): doc for doc in documents_to_process}
-            
-            for future in tqdm(as_completed(future_to_doc), total=len(documents_to_process), desc="Processing documents"):
-                new_docs.extend(future.result())
-
-        if new_documents:
-            return new_docs
-        else:
-            self.docs = new_docs
-            return []
-
-    def embed(self, new_docs: List[Dict[str, str]] = None) -> List[List[float]]:
-        """
-        Embeds the document chunks using the Cohere API.
-        """
-        docs_to_embed = new_docs or self.docs
-        print("Embedding document chunks...")
-
-        batch_size = 90
-        docs_len = len(docs_to_embed)
-        new_embeddings = []
-        
-        for i in range(0, docs_len, batch_size):
-            if i % 100 == 0:
-                print(f"Processing document chunk {i} of {docs_len}...")
-            batch = docs_to_embed[i : min(i + batch_size, docs_len)]
-            texts = [item["text"] for item in batch]
-            docs_embs_batch = co.embed(
-                texts=texts, model="embed-english-v3.0", input_type="search_document"
-            ).embeddings
-            new_embeddings.extend(docs_embs_batch)
-        
-        if new_docs:
-            return new_embeddings
+    return Response(body, content_type=content_type)
+
+# Batch endpoints take up to this many comma-separated tickers and fetch them side by side
+BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "50"))
+batch_executor = ThreadPoolExecutor(max_workers=int(os.getenv("BATCH_WORKERS", "16")))
+
+def parse_tickers(value):
+    """
+    Upper-cased, de-duplicated tickers from a comma-separated list, in the order given.
+    """
+    return list(dict.fromkeys(t.strip().upper() for t in (value or "").split(",") if t.strip()))
+
+def fetch_per_ticker(fetch, tickers):
+    """
+    Runs fetch(ticker) for every ticker concurrently; returns {"data": ..., "errors": ...} keyed by ticker.
+    """
+    jobs = {ticker: batch_executor.submit(fetch, ticker) for ticker in tickers}
+    data, errors = {}, {}
+    for ticker, job in jobs.items():
+        try:
+            data[ticker] = job.result()
+        except Exception as e:
+            print(f"Error fetching {ticker}: {e}")
+            errors[ticker] = str(e)
+    return {"data": data, "errors": errors}
+
+def batch_tickers():
+    tickers = parse_tickers(request.args.get('tickers'))
+    if not tickers:
+        return None, (jsonify({"error": "tickers is required"}), 400)
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return None, (jsonify({"error": f"At most {BATCH_MAX_TICKERS} tickers per request"}), 400)
+    return tickers, None
+
+@app.route('/batch/stock_data', methods=['GET'])
+@cached_endpoint(ttl=seconds_until_market_close)
+def batch_stock_data():
+    """
+    /stock_data for several tickers, e.g. /batch/stock_data?tickers=AAPL,MSFT&shape=columnar.
+    Tickers that need the same range are downloaded in one request.
+    """
+    tickers, error = batch_tickers()
+    if error:
+        return error
+    end_date = dt.datetime.now().date()
+    start_date = end_date - dt.timedelta(days=365*5)
+    
+    bars, errors = {}, {}
+    for ticker, data in price_store.get_many(tickers, start_date, end_date).items():
+        if isinstance(data, Exception):
+            errors[ticker] = str(data)
         else:
-            self.docs_embs = new_embeddings
-            return []
-
-    def index(self, new_embeddings: List[List[float]] = None) -> None:
-        """
-        Indexes the document chunks for efficient retrieval.
-        """
-        print("Indexing document chunks...")
-
-        if self.idx is None:
-            self.idx = hnswlib.Index(space="ip", dim=1024)
-            self.idx.init_index(max_elements=len(self.docs_embs), ef_construction=512, M=64)
-            self.idx.add_items(self.docs_embs, list(range(len(self.docs_embs))))
-        elif new_embeddings:
-            current_count = self.idx.get_current_count()
-            self.idx.resize_index(current_count + len(new_embeddings))
-            self.idx.add_items(new_embeddings, list(range(current_count, current_count + len(new_embeddings))))
-
-        print(f"Indexing complete with {self.idx.get_current_count()} document chunks.")
-
-    def add_documents(self, new_documents: List[Union[Dict[str, str], str]]) -> None:
-        """
-        Adds new documents to the existing Vectorstore.
-        """
-        new_docs = self.process_documents(new_documents)
-        new_embeddings = self.embed(new_docs)
-        self.index(new_embeddings)
-        
-        self.docs.extend(new_docs)
-        self.docs_embs.extend(new_embeddings)
-        self.documents.extend(new_documents)
-
-    def retrieve(self, query: str) -> List[Dict[str, str]]:
-        """
-        Retrieves document chunks based on the given query.
-        """
-        query_emb = co.embed(
-            texts=[query], model="embed-english-v3.0", input_type="search_query"
-        ).embeddings
-        
-        doc_ids = self.idx.knn_query(query_emb, k=self.retrieve_top_k)[0][0]
-
-        rank_fields = ["title", "text"]
-
-        docs_to_rerank = [self.docs[doc_id] for doc_id in doc_ids]
-        rerank_results = co.rerank(
-            query=query,
-            documents=docs_to_rerank,
-            top_n=self.rerank_top_k,
-            model="rerank-english-v3.0",
-            rank_fields=rank_fields
-        )
-
-        doc_ids_reranked = [doc_ids[result.index] for result in rerank_results.results]
-
-        docs_retrieved = []
-        for doc_id in doc_ids_reranked:
-            docs_retrieved.append(
-                {
-                    "title": self.docs[doc_id]["title"],
-                    "text": self.docs[doc_id]["text"],
-                    "url": self.docs[doc_id]["url"],
-                }
-            )
-
-        return docs_retrieved
+            bars[ticker] = format_bars(data)
+    
+    body = serialize_bars_batch(bars, errors, shape=request.args.get('shape', 'records'))
+    return Response(body, content_type="application/json")
+
+@app.route('/batch/yahoo_news', methods=['GET'])
+@cached_endpoint(ttl=5 * MINUTE)
+def batch_yahoo_news():
+    tickers, error = batch_tickers()
+    if error:
+        return error
+    return jsonify(fetch_per_ticker(get_yahoo_news, tickers))
+
+@app.route('/batch/benzinga_news', methods=['GET'])
+@cached_endpoint(ttl=5 * MINUTE)
+def batch_benzinga_news():
+    """
+    Each ticker's own news, unlike /benzinga_news which returns articles about exactly the given set of tickers.
+    """
+    tickers, error = batch_tickers()
+    if error:
+        return error
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    return jsonify(fetch_per_ticker(lambda ticker: get_benzinga_news(ticker, start_date, end_date), tickers))
+
+@app.route('/batch/filings', methods=['GET'])
+@cached_endpoint(ttl=3 * DAY)
+def batch_filings():
+    tickers, error = batch_tickers()
+    if error:
+        return error
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    if start_date:
+        start_date = dt.datetime.strptime(start_date, '%Y-%m-%d')
+    if end_date:
+        end_date = dt.datetime.strptime(end_date, '%Y-%m-%d')
+    return jsonify(fetch_per_ticker(lambda ticker: get_all_filings(ticker, start_date, end_date), tickers))
 
-vectorstore = Vectorstore([{"title": "investopedia", "url": "https://www.investopedia.com/"}])
+def load_vectorstore():
+    if Vectorstore.has_snapshot():
+        try:
+            return Vectorstore.load()
+        except ValueError as e:
+            print(f"Rebuilding vectorstore: {e}")
+    return Vectorstore([{"title": "investopedia", "url": "https://www.investopedia.com/"}])
+
+# Built on first use (or by warmup) so importing the app does no network or embedding work
+_vectorstore = None
+_vectorstore_lock = threading.Lock()
+
+def get_vectorstore() -> Vectorstore:
+    """
+    Returns the shared vectorstore, loading or building it and starting the refresh scheduler on first call.
+    """
+    global _vectorstore
+    if _vectorstore is None:
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                vectorstore = load_vectorstore()
+                # The scheduler records refresh times straight into the store, so they are saved with its snapshots
+                refresh_scheduler.refreshed_at.update(vectorstore.refreshed_at)
+                vectorstore.refreshed_at = refresh_scheduler.refreshed_at
+                _vectorstore = vectorstore
+                refresh_scheduler.start()
+    return _vectorstore
         
 def ensure_stock_embedded(ticker, vectorstore: Vectorstore):
-    if ticker not in embedded_stocks:
+    if ticker not in vectorstore.embedded_stocks:
         print(f"Embedding documents for {ticker}...")
         
-        # Retrieve and embed new documents
-        raw_documents = []
-        try:
-            raw_documents += get_all_filings(ticker)
-            raw_documents += get_benzinga_news(ticker)
-            raw_documents += get_yahoo_news(ticker)
-
-            vectorstore.add_documents(raw_documents)
-            vectorstore.embed()
-            vectorstore.index()
-        except Exception as e:
-            print(f"Error embedding documents for {ticker}: {e}")
+        # Documents indexed by an earlier, partly failed attempt are not indexed twice
+        namespace = vectorstore.namespace(ticker)
+        known_titles = namespace.docs.titles() if namespace else set()
+
+        def new_documents(retriever):
+            return lambda: (document for document in retriever(ticker) if document["title"] not in known_titles)
+
+        # Stream each retriever's documents through chunking, embedding and indexing;
+        # the ticker's namespace is searchable from the first indexed batch
+        sources = [new_documents(ir.iter_filings), new_documents(get_benzinga_news), new_documents(get_yahoo_news)]
+        pipeline = IngestionPipeline(vectorstore, ticker)
+        indexed = pipeline.run(sources)
+        if indexed:
+            chat_cache.invalidate(ticker)
+        if not indexed and not known_titles:
+            print(f"No documents were embedded for {ticker}")
+            return
+        if pipeline.failures:
+            # Left unmarked so the next request retries; refresh_stock only looks for filings newer than the last refresh
+            print(f"Embedding {ticker} was incomplete ({pipeline.failures} failures), it will be retried")
+            vectorstore.save()
             return
         
-        # Add to the list of embedded stocks
-        embedded_stocks.append(ticker)
+        # Add to the set of embedded stocks and persist so the next start skips this work
+        vectorstore.embedded_stocks.add(ticker)
+        refresh_scheduler.mark_refreshed(ticker)
+        vectorstore.save()
     else:
         print(f"Documents for {ticker} are already embedded.")
-        
-ensure_stock_embedded("AAPL", vectorstore)
-        
-@app.route('/chat', methods=['POST'])
-def chat():
-    data = request.json
-    message = data.get('message')
-    chat_history = data.get('chat_history', [])
-    
-    try:
 
-        if not message:
-            return jsonify({"error": "Message is required"}), 400
+# LLM calls made within one chat turn run side by side on chat_executor, while
+# cold tickers are embedded on ingestion_executor without holding up the response
+chat_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CHAT_WORKERS", "8")))
+ingestion_executor = ThreadPoolExecutor(max_workers=int(os.getenv("INGESTION_WORKERS", "2")))
+ingestion_jobs = {}
+ingestion_lock = threading.Lock()
+
+def schedule_stock_embedding(ticker, vectorstore: Vectorstore):
+    """
+    Starts embedding a ticker in the background, returning the running job or None if it is already embedded.
+    """
+    if ticker in vectorstore.embedded_stocks:
+        return None
+
+    with ingestion_lock:
+        job = ingestion_jobs.get(ticker)
+        if job is None:
+            print(f"Scheduling background embedding for {ticker}...")
+            job = ingestion_executor.submit(ensure_stock_embedded, ticker, vectorstore)
+            ingestion_jobs[ticker] = job
+
+            def forget_job(_):
+                with ingestion_lock:
+                    ingestion_jobs.pop(ticker, None)
+
+            job.add_done_callback(forget_job)
+    return job
+
+def embed_new_articles(ticker, articles):
+    """
+    News store subscriber: indexes freshly fetched articles into tickers whose namespace is already built.
+    Tickers still being embedded pick their news up through the ingestion pipeline instead.
+    """
+    # Before the vectorstore is loaded no ticker is embedded, and a news request must not load it
+    vectorstore = _vectorstore
+    if vectorstore is None or ticker not in vectorstore.embedded_stocks:
+        return
+    documents = [
+        {"title": article["headline"], "url": article["url"]}
+        for article in articles
+        if set(article["symbols"]) == {ticker}
+    ]
+    if not documents:
+        return
+
+    def index_articles():
+        if IngestionPipeline(vectorstore, ticker).run([lambda: documents]):
+            vectorstore.save()
+            chat_cache.invalidate(ticker)
+
+    print(f"Indexing {len(documents)} new articles for {ticker}...")
+    ingestion_executor.submit(index_articles)
+
+ir.news_store.subscribe(embed_new_articles)
+
+FILING_TITLE_ACCESSION = re.compile(r"Form [^(,]+ \(([0-9-]+)\)")
+
+def filing_accessions(titles):
+    """
+    Accession numbers of the filings among a namespace's chunk titles ("Form 8-K (0000320193-24-000123), ...").
+    """
+    return {match.group(1) for match in map(FILING_TITLE_ACCESSION.match, titles) if match}
+
+def refresh_stock(ticker):
+    """
+    Incremental refresh run by the scheduler for an embedded ticker: pulls news since the
+    last fetch (indexed by embed_new_articles) and indexes filings filed since the last refresh.
+    Returns the number of new documents.
+    """
+    now = dt.datetime.now()
+    refreshed_at = refresh_scheduler.refreshed_at.get(ticker)
+    since = dt.datetime.fromtimestamp(refreshed_at) if refreshed_at else now - dt.timedelta(days=7)
+    since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    new_articles = ir.news_feed.update(ticker, now.astimezone(dt.timezone.utc) - dt.timedelta(days=7), now.astimezone(dt.timezone.utc))
+    new_news = sum(set(article["symbols"]) == {ticker} for article in new_articles)
+
+    vectorstore = get_vectorstore()
+    namespace = vectorstore.namespace(ticker)
+    known_accessions = filing_accessions(namespace.docs.titles()) if namespace else set()
+    new_filings = [filing for filing in ir.iter_filings(ticker, since, now) if filing["accession_number"] not in known_accessions]
+    if new_filings:
+        pipeline = IngestionPipeline(vectorstore, ticker)
+        if pipeline.run([lambda: new_filings]):
+            vectorstore.save()
+            chat_cache.invalidate(ticker)
+        if pipeline.failures:
+            # The scheduler keeps the previous refresh time, so the next refresh retries these filings
+            raise RuntimeError(f"{pipeline.failures} failures indexing new filings")
+
+    return new_news + len(new_filings)
+
+# Popular tickers are refreshed in the background so /chat answers from fresh data without ingesting inline
+refresh_scheduler = RefreshScheduler(
+    refresh=refresh_stock,
+    evict=lambda ticker: get_vectorstore().evict(ticker),
+    embedded=lambda: set(get_vectorstore().embedded_stocks),
+)
 
-        print("Using perplexity to generate response...")
+WARMUP_TICKERS = [t.strip().upper() for t in os.getenv("WARMUP_TICKERS", "AAPL").split(",") if t.strip()]
+# Entry points start warmup in the background after binding; set to 0 to stay fully lazy
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+warmup_state = {"status": "idle", "started_at": None, "finished_at": None, "error": None}
+warmup_lock = threading.Lock()
+
+def warmup():
+    """
+    Loads the vectorstore and ticker resolver and embeds WARMUP_TICKERS. Runs once; later calls return the
+    current state. A ticker that fails to embed is logged and does not fail warmup.
+    """
+    with warmup_lock:
+        if warmup_state["status"] != "idle":
+            return dict(warmup_state)
+        warmup_state.update(status="running", started_at=time.time())
 
-        # Generate search queries, if any
-        response = co.chat(
+    try:
+        vectorstore = get_vectorstore()
+        get_resolver()
+        for ticker in WARMUP_TICKERS:
+            try:
+                ensure_stock_embedded(ticker, vectorstore)
+            except Exception as e:
+                print(f"Warmup could not embed {ticker}: {e}")
+        warmup_state.update(status="ready", finished_at=time.time())
+    except Exception as e:
+        print(f"Warmup failed: {e}")
+        warmup_state.update(status="failed", finished_at=time.time(), error=str(e))
+    return dict(warmup_state)
+
+def start_warmup():
+    threading.Thread(target=warmup, name="warmup", daemon=True).start()
+
+# Answers to first questions, reused for near-identical questions about the same ticker
+chat_cache = SemanticCache()
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    vectorstore_stats = _vectorstore.stats() if _vectorstore is not None else {}
+    return jsonify({**response_cache.stats(), **vectorstore_stats, "chat_cache": chat_cache.stats()})
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    """
+    Ready once warmup has finished; until then load balancers should keep traffic away.
+    """
+    state = {**warmup_state, "vectorstore_loaded": _vectorstore is not None}
+    return jsonify(state), 200 if state["status"] == "ready" else 503
+
+@app.route('/warmup', methods=['POST'])
+def warmup_endpoint():
+    start_warmup()
+    return jsonify(dict(warmup_state)), 202
+
+@app.route('/ingestion_status', methods=['GET'])
+def ingestion_status():
+    ticker = request.args.get('ticker', '').strip().upper()
+    with ingestion_lock:
+        pending = ticker in ingestion_jobs
+    # A status poll must not load the vectorstore; before it is loaded nothing is embedded
+    vectorstore = _vectorstore
+    if vectorstore is None:
+        return jsonify({
+            "ticker": ticker,
+            "embedded": False,
+            "pending": pending,
+            "in_memory": False,
+            "refreshed_at": refresh_scheduler.refreshed_at.get(ticker),
+            "vectorstore_loaded": False,
+        })
+    return jsonify({
+        "ticker": ticker,
+        "embedded": ticker in vectorstore.embedded_stocks,
+        "pending": pending,
+        "in_memory": ticker in vectorstore.namespaces,
+        "refreshed_at": refresh_scheduler.refreshed_at.get(ticker),
+        "vectorstore_loaded": True,
+    })
+        
+def prepare_chat(message, chat_history):
+    """
+    Resolves the ticker and builds the prompt for a chat turn.
+
+    A generator, so a streaming client can be told what is happening: it yields a
+    stage name before each slow step and returns the turn as a dict holding the
+    prompt messages, the cited sources and, on a cache hit, the cached answer.
+    """
+    turn = {"ticker": None, "sources": [], "embedding_job": None, "cached": None, "cacheable": False, "start": time.perf_counter()}
+    turn["messages"] = [
+        {
+            "role": "system",
+            "content": (
+                "You are an artificial intelligence assistant and you need to engage in a helpful, detailed, polite conversation with a user."
+            ),
+        },
+        *chat_history,
+        {
+            "role": "user",
+            "content": message,
+        },
+    ]
+
+    try:
+        yield "resolving_ticker"
+        vectorstore = get_vectorstore()
+
+        # Generate search queries and resolve the ticker at the same time
+        queries_job = chat_executor.submit(
+            co.chat,
             message=message,
             preamble="You must make the first search query the ticker of the stock in question.",
             model="command-r-plus",
@@ -307,55 +598,148 @@ def chat():
             chat_history=chat_history
         )
         
+        # Resolved locally from the SEC ticker table; only ambiguous messages go to the LLM
+        ticker_job = chat_executor.submit(resolve_ticker, message, co)
         
-        ticker = co.chat(
-            model="command-r-plus",
-            preamble="you are going to return only the ticker for the company that the user is asking about. The ticker should be formatted with MAX 4 characters and MIN 2 characters",
-            message=message,
-            connectors=[{"id": "web-search"}]
-        )
+        # Follow-up questions depend on the conversation, so only first questions go through the answer cache
+        if not chat_history:
+            turn["embedding_job"] = chat_executor.submit(lambda: vectorstore.embed_queries([message])[0])
         
-        ensure_stock_embedded(ticker=ticker.text, vectorstore=vectorstore)
-        print(f"Using perplexity to generate response for {ticker.text}...")
+        ticker = turn["ticker"] = ticker_job.result()
+        refresh_scheduler.record(ticker)
+        # A cold ticker is embedded in the background; this turn answers from what is already indexed
+        embedding_scheduled = ticker is not None and schedule_stock_embedding(ticker, vectorstore) is not None
+        if embedding_scheduled:
+            print(f"{ticker} is not embedded yet, answering from the existing index...")
         
+        if turn["embedding_job"] is not None and ticker is not None:
+            cached = chat_cache.get(ticker, turn["embedding_job"].result())
+            if cached is not None:
+                queries_job.cancel()
+                print(f"Answering from the chat cache for {ticker}...")
+                turn["cached"] = cached
+                return turn
+        print(f"Using perplexity to generate response for {ticker}...")
+        
+        yield "retrieving"
+        response = queries_job.result()
 
         search_queries = []
         for query in response.search_queries:
             search_queries.append(query.text)
 
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are an artificial intelligence assistant and you need to engage in a helpful, detailed, polite conversation with a user."
-                ),
-            },
-            *chat_history,
-            {
-                "role": "user",
-                "content": message,
-            },
-        ]
-
         # If there are search queries, retrieve the documents
         if search_queries:
             print("Retrieving information...", end="")
-            documents = []
-            for query in search_queries:
-                documents.extend(vectorstore.retrieve(query))
+            namespace = ticker if vectorstore.has_namespace(ticker) else GENERAL_NAMESPACE
+            documents = vectorstore.retrieve_many(search_queries, namespace=namespace)
+
+            # Deduplicated, best first and cut to the token budget, so prompt size stays bounded
+            context, turn["sources"] = build_context(documents)
+            if context:
+                turn["messages"][-1]["content"] += (
+                    " You may use the following information to generate a response but you should generate and use your own sources."
+                    f" Cite it by its [id]:\n\n{context}"
+                )
+
+        # Answers given before the ticker's own documents are indexed, or without a ticker, are not reused
+        turn["cacheable"] = ticker is not None and not embedding_scheduled
+    except Exception as e:
+        print(f"Error preparing chat context: {e}")
+
+    return turn
+
+def run_to_completion(steps):
+    """
+    Runs a generator to the end, ignoring what it yields, and returns its return value.
+    """
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def remember_answer(turn, answer):
+    job = turn["embedding_job"]
+    if turn["cacheable"] and job is not None and job.done() and not job.exception():
+        chat_cache.put(turn["ticker"], job.result(), answer, time.perf_counter() - turn["start"])
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_chat(message, chat_history):
+    """
+    Server-sent events for a chat turn: a status event per stage, a token event per
+    completion delta as Perplexity produces it, then a done event with the citations.
+    """
+    steps = prepare_chat(message, chat_history)
+    while True:
+        try:
+            yield sse("status", {"stage": next(steps)})
+        except StopIteration as stop:
+            turn = stop.value
+            break
+
+    if turn["cached"] is not None:
+        yield sse("token", {"text": turn["cached"]["response"]})
+        yield sse("done", {"citations": turn["cached"]["citations"], "sources": turn["cached"]["sources"], "cached": True})
+        return
+
+    yield sse("status", {"stage": "generating"})
+    parts = []
+    citations = []
+    try:
+        stream = perplexity_client().chat.completions.create(model=CHAT_MODEL, messages=turn["messages"], stream=True)
+        for chunk in stream:
+            # Perplexity repeats the citations on every chunk
+            citations = getattr(chunk, "citations", None) or citations
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield sse("token", {"text": chunk.choices[0].delta.content})
+    except Exception as e:
+        print(f"Error streaming chat response: {e}")
+        yield sse("error", {"error": str(e)})
+        return
+
+    answer = {"response": "".join(parts), "citations": citations, "sources": turn["sources"]}
+    remember_answer(turn, answer)
+    yield sse("done", {"citations": citations, "sources": turn["sources"], "cached": False})
+
+@app.route('/chat', methods=['POST'])
+@slow_endpoint
+def chat():
+    data = request.json
+    message = data.get('message')
+    chat_history = data.get('chat_history', [])
+
+    if not message:
+        return jsonify({"error": "Message is required"}), 400
+
+    print("Using perplexity to generate response...")
+
+    # Streaming clients get status and token events as they happen instead of one body at the end
+    if data.get('stream') or 'text/event-stream' in request.headers.get('Accept', ''):
+        return Response(
+            stream_chat(message, chat_history),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-            messages[1]["content"] += f" You may use the following information to generate a response but you should generate and use your own sources: {documents}"
-    except:
-        pass
+    turn = run_to_completion(prepare_chat(message, chat_history))
+    if turn["cached"] is not None:
+        return turn["cached"]
 
-    response = perclient.chat.completions.create(
-        model="llama-3.1-sonar-large-128k-online",
-        messages=messages
+    response = perplexity_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=turn["messages"]
     )
     print({"response": response.choices[0].message.content})
-    return {"response": response.choices[0].message.content, "citations": response.citations}
+    answer = {"response": response.choices[0].message.content, "citations": response.citations, "sources": turn["sources"]}
+    remember_answer(turn, answer)
+    return answer
 
 @app.route('/algowriter', methods=['POST'])
+@slow_endpoint
 def algowriter():
     data = request.json
     prompt = data.get('message')
@@ -397,7 +781,7 @@ def algowriter():
     additional_context = "\n".join([f"Content of {filename}:\n{content}" 
                                 for filename, content in generation_files.items()])
 
-    samba_response = samba.chat.completions.create(
+    samba_response = samba_client().chat.completions.create(
         model="Meta-Llama-3.1-70B-Instruct",
         messages=[
             {
@@ -434,4 +818,15 @@ def test_chat():
 
 
 if __name__ == '__main__':
-    app.run(debug=True, port=8080, use_reloader=False)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="InvestIQ backend")
+    parser.add_argument("--warmup", action="store_true", help="load the vectorstore and embed WARMUP_TICKERS, then exit")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    args = parser.parse_args()
+
+    if args.warmup:
+        raise SystemExit(0 if warmup()["status"] == "ready" else 1)
+    if WARMUP_ON_START:
+        start_warmup()
+    app.run(debug=True, port=args.port, use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Production entry point: uvicorn serves the Flask app from a pool of request threads.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8080
+    python asgi.py
+
+Run a single worker process. The vector store, its background ingestion and the
+refresh scheduler live in the process, and a second worker would build and save
+its own copy of the index. Scale with SERVER_THREADS instead; slow endpoints are
+capped at SLOW_REQUEST_SLOTS threads so the rest stay free for fast requests.
+
+Importing the app does no network work. Warmup (loading the vector store and
+embedding WARMUP_TICKERS) runs on a background thread unless WARMUP_ON_START=0;
+/readyz answers 503 until it has finished.
+"""
+import os
+
+from uvicorn.middleware.wsgi import WSGIMiddleware
+
+from app import app as flask_app, start_warmup, WARMUP_ON_START
+
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "64"))
+
+# Each request runs on the middleware's thread pool; streamed bodies are sent chunk by chunk
+app = WSGIMiddleware(flask_app, workers=SERVER_THREADS)
+
+if WARMUP_ON_START:
+    start_warmup()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8080")), timeout_keep_alive=75)
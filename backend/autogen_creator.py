@@ -14,46 +14,12 @@ os.environ["SAMBA_NOVA_API_KEY"] = SAMBA_NOVA_API_KEY
 os.environ["OPENAI_API_KEY"] = SAMBA_NOVA_API_KEY
 
 import datetime
+import threading
 
-from autogen import ConversableAgent
-from autogen.coding import LocalCommandLineCodeExecutor
-import autogen
 
-
-# Create a local command line code executor.
-executor = LocalCommandLineCodeExecutor(
-    timeout=10,  # Timeout for each code execution in seconds.
-    work_dir="generation",  # Use the temporary directory to store the code files.
-)
-code_executor_agent = ConversableAgent(
-    "code_executor_agent",
-    llm_config=False,  # Turn off LLM for this agent.
-    code_execution_config={"executor": executor},  # Use the local command line code executor.
-    human_input_mode="NEVER",  # Always take human input for this agent for safety.
-    is_termination_msg=lambda msg: "silence" in msg["content"].lower() or "" == msg["content"],
-)
-
-import datetime
-
-from autogen import ConversableAgent
-from autogen.coding import LocalCommandLineCodeExecutor
-
-
-# Create a local command line code executor.
-executor = LocalCommandLineCodeExecutor(
-    timeout=10,  # Timeout for each code execution in seconds.
-    work_dir="generation",  # Use the temporary directory to store the code files.
-)
-code_executor_agent = ConversableAgent(
-    "code_executor_agent",
-    llm_config=False,  # Turn off LLM for this agent.
-    code_execution_config={"executor": executor},  # Use the local command line code executor.
-    human_input_mode="NEVER",  # Always take human input for this agent for safety.
-    is_termination_msg=lambda msg: "silence" in msg["content"].lower() or "" == msg["content"] or "feel free to ask." in msg["content"] or  "done" in msg["content"].lower(),
-)
-
-date = datetime.datetime.now().strftime("%Y-%m-%d")
-code_writer_system_message = f"""
+def code_writer_system_message():
+    date = datetime.datetime.now().strftime("%Y-%m-%d")
+    return f"""
 If you recieve an empty message, reply with "done"
 Today is {date}.
 You are an expert algorithmic trader.
@@ -88,18 +54,48 @@ Reply 'TERMINATE' in the end when everything is done.
 When you made the readme file, you can reply 'DONE' to end the conversation.
 """
 
-code_writer_agent = ConversableAgent(
-    "code_writer_agent",
-    system_message=code_writer_system_message,
-    llm_config={"config_list": config_list},
-    code_execution_config=False,  # Turn off code execution for this agent.
-    # end of conversation when the agent says 'DONE'
-    is_termination_msg=lambda msg: "done" in msg["content"].lower() or "feel free to ask." in msg["content"] or "terminate" in msg["content"].lower(),
-    human_input_mode="NEVER",  # Always take human input for this agent for safety.
+_agents = None
+_agents_lock = threading.Lock()
+
+
+def get_agents():
+    """
+    Returns the (code writer, code executor) agents, building them on first use
+    so importing this module does not pay for importing autogen.
+    """
+    global _agents
+    with _agents_lock:
+        if _agents is None:
+            from autogen import ConversableAgent
+            from autogen.coding import LocalCommandLineCodeExecutor
+
+            # Create a local command line code executor.
+            executor = LocalCommandLineCodeExecutor(
+                timeout=10,  # Timeout for each code execution in seconds.
+                work_dir="generation",  # Use the temporary directory to store the code files.
+            )
+            code_executor_agent = ConversableAgent(
+                "code_executor_agent",
+                llm_config=False,  # Turn off LLM for this agent.
+                code_execution_config={"executor": executor},  # Use the local command line code executor.
+                human_input_mode="NEVER",  # Always take human input for this agent for safety.
+                is_termination_msg=lambda msg: "silence" in msg["content"].lower() or "" == msg["content"] or "feel free to ask." in msg["content"] or  "done" in msg["content"].lower(),
+            )
+            code_writer_agent = ConversableAgent(
+                "code_writer_agent",
+                system_message=code_writer_system_message(),
+                llm_config={"config_list": config_list},
+                code_execution_config=False,  # Turn off code execution for this agent.
+                # end of conversation when the agent says 'DONE'
+                is_termination_msg=lambda msg: "done" in msg["content"].lower() or "feel free to ask." in msg["content"] or "terminate" in msg["content"].lower(),
+                human_input_mode="NEVER",  # Always take human input for this agent for safety.
+            )
+            _agents = (code_writer_agent, code_executor_agent)
+    return _agents
 
-)
 
 def write_algorithm(prompt):
+    code_writer_agent, code_executor_agent = get_agents()
     chat_result = code_writer_agent.initiate_chat(
         code_executor_agent,
         message=prompt,
@@ -0,0 +1,86 @@
+"""
+Compares loading a watchlist one ticker at a time (one /stock_data request per
+symbol) with PriceStore.get_many, which downloads every ticker in one provider call.
+
+    python benchmarks/bench_batch_stock_data.py --tickers 20 --latency-ms 300
+
+The provider sleeps for the given latency per call, like a yf.download round trip,
+and returns synthetic bars. One ticker fails to show per-ticker error reporting.
+"""
+import argparse
+import datetime as dt
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceProvider, PriceStore
+
+MISSING = "NOPE"
+
+
+class SlowProvider(PriceProvider):
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def _bars(self, start, end):
+        dates = pd.bdate_range(start, end - dt.timedelta(days=1), name="Date")
+        close = 100 + np.random.default_rng(0).standard_normal(len(dates)).cumsum()
+        return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Adj Close": close, "Volume": 1000}, index=dates)
+
+    def fetch(self, ticker, start, end):
+        self.calls += 1
+        time.sleep(self.latency)
+        if ticker == MISSING:
+            raise ValueError(f"No data found for {ticker}")
+        return self._bars(start, end)
+
+    def fetch_many(self, tickers, start, end):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {ticker: self._bars(start, end) for ticker in tickers if ticker != MISSING}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    tickers = [f"T{i:02d}" for i in range(args.tickers - 1)] + [MISSING]
+    end = dt.date.today()
+    start = end - dt.timedelta(days=365 * 5)
+
+    with tempfile.TemporaryDirectory() as path:
+        provider = SlowProvider(args.latency_ms / 1000)
+        store = PriceStore(provider, path=os.path.join(path, "single"))
+        began = time.perf_counter()
+        failed = 0
+        for ticker in tickers:
+            try:
+                store.get(ticker, start, end)
+            except Exception:
+                failed += 1
+        single = time.perf_counter() - began
+        single_calls = provider.calls
+
+        provider = SlowProvider(args.latency_ms / 1000)
+        store = PriceStore(provider, path=os.path.join(path, "batch"))
+        began = time.perf_counter()
+        results = store.get_many(tickers, start, end)
+        batch = time.perf_counter() - began
+        errors = {ticker: str(result) for ticker, result in results.items() if isinstance(result, Exception)}
+
+    print(f"{args.tickers} tickers at {args.latency_ms:.0f}ms per provider call")
+    print(f"  one ticker at a time: {single:6.2f}s, {single_calls} provider calls, {failed} failed")
+    print(f"  get_many:             {batch:6.2f}s, {provider.calls} provider calls, errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Compares time to first byte of a blocking /chat request with a streamed one
+(server-sent events), with Perplexity replaced by the local fake LLM server.
+
+    python benchmarks/bench_chat_streaming.py --tokens 200 --token-delay-ms 20 --first-token-delay-ms 300
+
+Both requests go through the Flask app's /chat route, slow_endpoint and, for the
+streamed one, stream_chat. Ticker resolution and retrieval (prepare_chat) are
+replaced by a stand-in that takes --prepare-ms, so no Cohere calls or vector
+store are needed. A blocking request returns nothing until the whole completion
+is generated; a streamed request sends status events at once and the first token
+as soon as it is produced.
+
+It then sends more streamed requests than there are slow request slots through
+asgi.app, the production entry point, and fails unless every slot is given back.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm_server import start_server
+
+MESSAGE = "What is the latest news on NVDA?"
+
+
+def fake_prepare_chat(prepare_seconds):
+    def prepare_chat(message, chat_history):
+        turn = {"ticker": "NVDA", "sources": [], "embedding_job": None, "cached": None, "cacheable": False, "start": time.perf_counter()}
+        turn["messages"] = [*chat_history, {"role": "user", "content": message}]
+        yield "resolving_ticker"
+        yield "retrieving"
+        time.sleep(prepare_seconds)
+        return turn
+
+    return prepare_chat
+
+
+def timed_request(client, stream):
+    """
+    Returns (first byte, first token, complete) in seconds for one /chat request.
+    """
+    start = time.perf_counter()
+    response = client.post("/chat", json={"message": MESSAGE, "stream": stream}, buffered=False)
+    assert response.status_code == 200, response.status_code
+    first_byte = first_token = None
+    body = b""
+    try:
+        for chunk in response.response:
+            if not chunk:
+                continue
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            body += chunk
+            if first_token is None and (b"event: token" in body or not stream):
+                first_token = time.perf_counter() - start
+    finally:
+        response.close()
+    complete = time.perf_counter() - start
+
+    if stream:
+        assert b"event: done" in body, body[-200:]
+    else:
+        assert json.loads(body)["response"]
+    return first_byte, first_token, complete
+
+
+def free_slots(app):
+    free = 0
+    while app.slow_request_slots.acquire(blocking=False):
+        free += 1
+    for _ in range(free):
+        app.slow_request_slots.release()
+    return free
+
+
+async def stream_through_asgi(count):
+    """
+    Sends count streamed /chat requests one after another through uvicorn's WSGI middleware.
+    """
+    import httpx
+
+    import asgi
+
+    transport = httpx.ASGITransport(app=asgi.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://asgi") as client:
+        for _ in range(count):
+            response = await client.post("/chat", json={"message": MESSAGE, "stream": True})
+            assert response.status_code == 200, f"streamed /chat answered {response.status_code}"
+            assert "event: done" in response.text, response.text[-200:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    parser.add_argument("--first-token-delay-ms", type=float, default=300)
+    parser.add_argument("--prepare-ms", type=float, default=500, help="time taken by ticker resolution and retrieval")
+    args = parser.parse_args()
+
+    server = start_server(0, args.tokens, args.token_delay_ms / 1000, args.first_token_delay_ms / 1000)
+    os.environ["PERPLEXITY_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("PERPLEXITY_API_KEY", "fake")
+    os.environ["WARMUP_ON_START"] = "0"
+
+    import app
+
+    app.prepare_chat = fake_prepare_chat(args.prepare_ms / 1000)
+    client = app.app.test_client()
+
+    blocking = timed_request(client, stream=False)
+    streamed = timed_request(client, stream=True)
+
+    print(f"/chat, {args.prepare_ms:.0f}ms to prepare, {args.tokens} tokens, "
+          f"{args.first_token_delay_ms:.0f}ms to first token, {args.token_delay_ms:.0f}ms per token")
+    for name, (first_byte, first_token, complete) in (("blocking", blocking), ("streamed", streamed)):
+        print(f"  {name}: first byte {first_byte:6.2f}s, first token {first_token:6.2f}s, complete {complete:6.2f}s")
+
+    streams = app.SLOW_REQUEST_SLOTS + 4
+    asyncio.run(stream_through_asgi(streams))
+    server.shutdown()
+    free = free_slots(app)
+    print(f"asgi: {streams} streamed requests, {free} of {app.SLOW_REQUEST_SLOTS} slow request slots free afterwards")
+    if free != app.SLOW_REQUEST_SLOTS:
+        raise SystemExit("streamed responses served through asgi.app did not give back their slots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Measures /earnings_report style lookups against the financial statement store:
+the first request (list and parse from EDGAR), repeats, a reload from Parquet,
+and the multi-period query.
+
+    python benchmarks/bench_financials_store.py --periods 8 --edgar-latency-ms 400
+
+EDGAR is replaced by functions that sleep for the given latency and return
+statements shaped like edgartools output (timestamp columns, numpy values). It
+fails if a report reads back from Parquet differently from when it was parsed, or
+if a filing that cannot be parsed is reported as missing.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from financials_store import FinancialsStore, FinancialsUnavailable, STATEMENTS
+
+
+def fake_edgar(latency, filings=20, line_items=40):
+    dates = pd.date_range(end=pd.Timestamp.today(), periods=filings, freq="91D")[::-1]
+    listing = pd.DataFrame({
+        "accession_number": [f"0000000000-24-{i:06d}" for i in range(filings)],
+        "form": ["10-K" if date.quarter == 4 else "10-Q" for date in dates],
+        "filing_date": dates,
+    })
+
+    def list_filings(ticker):
+        time.sleep(latency)
+        return listing
+
+    def fetch_financials(accession_number):
+        time.sleep(latency)
+        columns = [pd.Timestamp(f"2024-0{q}-30") for q in (3, 6, 9)]
+        return {
+            statement: {column: {f"{statement} line {i}": np.float64(i * 1e6) for i in range(line_items)} for column in columns}
+            for statement in STATEMENTS
+        }
+
+    return list_filings, fetch_financials, listing
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--periods", type=int, default=8)
+    parser.add_argument("--edgar-latency-ms", type=float, default=400)
+    args = parser.parse_args()
+
+    list_filings, fetch_financials, listing = fake_edgar(args.edgar_latency_ms / 1000)
+    first = listing[listing["form"] == "10-Q"].iloc[0]["filing_date"]
+    year, quarter = first.year, first.quarter
+
+    with tempfile.TemporaryDirectory() as path:
+        store = FinancialsStore(list_filings, fetch_financials, path=path)
+        cold, report = timed(lambda: store.report("AAPL", year, quarter))
+        warm, _ = timed(lambda: store.report("AAPL", year, quarter), repeat=1000)
+        multi_cold, periods = timed(lambda: store.latest("AAPL", args.periods))
+        multi_warm, _ = timed(lambda: store.latest("AAPL", args.periods), repeat=1000)
+
+        reloaded = FinancialsStore(list_filings, fetch_financials, path=path)
+        reload_first, reloaded_report = timed(lambda: reloaded.report("AAPL", year, quarter))
+        assert reloaded_report == report, "report read back from Parquet differs from the parsed one"
+
+        def unparseable(accession_number):
+            raise ValueError("no XBRL")
+
+        try:
+            FinancialsStore(list_filings, unparseable, path=os.path.join(path, "failing")).report("AAPL", year, quarter)
+            raise AssertionError("a filing that could not be parsed was reported as missing")
+        except FinancialsUnavailable:
+            pass
+
+    print(f"EDGAR latency {args.edgar_latency_ms:.0f}ms per call")
+    print(f"  report, first request:         {cold * 1000:9.3f}ms")
+    print(f"  report, repeat:                {warm * 1000:9.3f}ms")
+    print(f"  report, after restart:         {reload_first * 1000:9.3f}ms")
+    print(f"  last {args.periods} periods, first request: {multi_cold * 1000:9.3f}ms ({len(periods)} periods)")
+    print(f"  last {args.periods} periods, repeat:        {multi_warm * 1000:9.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares fetching a batch of article URLs one connection at a time (the old
+requests.get loop) with http_client.get_many over the shared pool.
+
+    python benchmarks/bench_http_fetch.py --urls 50 --latency-ms 200
+
+Serves the pages from a local threaded HTTP server that sleeps for the given latency.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from http_client import HttpClient
+
+
+def slow_handler(latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            body = f"<html><body><p>Article {self.path}</p></body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer(("127.0.0.1", 0), slow_handler(args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/article/{i}" for i in range(args.urls)]
+
+    start = time.perf_counter()
+    for url in urls:
+        httpx.get(url)
+    sequential = time.perf_counter() - start
+
+    client = HttpClient()
+    client.get(urls[0])  # start the loop and open a connection outside the timing
+    start = time.perf_counter()
+    responses = client.get_many(urls)
+    pooled = time.perf_counter() - start
+    failed = sum(not isinstance(response, httpx.Response) or response.status_code != 200 for response in responses)
+
+    print(f"{args.urls} URLs at {args.latency_ms:.0f}ms each")
+    print(f"  sequential, new connection each: {sequential:6.2f}s")
+    print(f"  pooled get_many:                 {pooled:6.2f}s ({failed} failed)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures the cost of adding one more ticker to the Vectorstore as the corpus grows.
+
+    python benchmarks/bench_incremental_ingest.py --tickers 2 50 500 --chunks-per-ticker 40
+
+Embeddings come from a fake Cohere client, so the timings cover chunking, the
+embedding cache, index growth and HNSW insertion, but no network.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COHERE_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite"))
+
+import numpy as np
+
+import vectorstore as vs
+
+
+class FakeCohere:
+    def __init__(self):
+        self.embedded = 0
+        self.rng = np.random.default_rng(0)
+
+    def embed(self, texts, model, input_type):
+        self.embedded += len(texts)
+        vectors = self.rng.standard_normal((len(texts), vs.EMBED_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return SimpleNamespace(embeddings=vectors.tolist())
+
+
+def ticker_documents(ticker_number, chunks_per_ticker):
+    return [f"TICK{ticker_number} filing section {i}: revenue, margins and guidance" for i in range(chunks_per_ticker)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[2, 50, 500])
+    parser.add_argument("--chunks-per-ticker", type=int, default=40)
+    args = parser.parse_args()
+
+    vs.co = FakeCohere()
+    store = vs.Vectorstore()
+    tickers_loaded = 0
+
+    print(f"{'ticker N':>9} {'corpus chunks':>14} {'chunks embedded':>16} {'seconds':>9}")
+    for target in sorted(args.tickers):
+        # Grow the corpus to N - 1 tickers without timing it
+        with contextlib.redirect_stdout(io.StringIO()):
+            while tickers_loaded < target - 1:
+                tickers_loaded += 1
+                store.add_documents(ticker_documents(tickers_loaded, args.chunks_per_ticker), namespace=f"TICK{tickers_loaded}")
+
+        corpus_size = sum(len(ns) for ns in store.namespaces.values())
+        embedded_before = vs.co.embedded
+        tickers_loaded += 1
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.add_documents(ticker_documents(tickers_loaded, args.chunks_per_ticker), namespace=f"TICK{tickers_loaded}")
+        elapsed = time.perf_counter() - start
+
+        print(f"{target:>9} {corpus_size:>14} {vs.co.embedded - embedded_before:>16} {elapsed:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
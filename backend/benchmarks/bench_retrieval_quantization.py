@@ -0,0 +1,85 @@
+"""
+Compares recall@k, query throughput, build time and index memory of the
+retrieval settings: HNSW with different M / ef_construction / ef, and the
+int8 and binary quantized scans with exact re-scoring.
+
+    python benchmarks/bench_retrieval_quantization.py --vectors 20000 --queries 200
+
+Vectors are synthetic clustered unit vectors of the embedding dimension;
+recall is measured against an exact brute-force inner-product search.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COHERE_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite"))
+
+import numpy as np
+
+import vectorstore as vs
+
+# (label, quantization, M, ef_construction, ef, oversample)
+CONFIGS = [
+    ("hnsw M64 efc512 ef10 (original)", "none", 64, 512, 10, None),
+    ("hnsw M64 efc512 ef64", "none", 64, 512, 64, None),
+    ("hnsw M16 efc200 ef64", "none", 16, 200, 64, None),
+    ("int8 rescore x4", "int8", None, None, None, 4),
+    ("binary rescore x4", "binary", None, None, None, 4),
+    ("binary rescore x10", "binary", None, None, None, 10),
+]
+
+
+def clustered_unit_vectors(count, dim, clusters, rng):
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def index_bytes(ns):
+    if ns.codes is not None:
+        return ns.codes.nbytes
+    return ns.idx.get_max_elements() * (vs.EMBED_DIM * 4 + ns.idx.M * 2 * 4 + 16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered_unit_vectors(args.vectors, vs.EMBED_DIM, 200, rng)
+    queries = clustered_unit_vectors(args.queries, vs.EMBED_DIM, 200, np.random.default_rng(1))
+    truth = np.argsort(-(queries @ data.T), axis=1)[:, : args.k]
+    docs = [{"title": "", "text": "", "url": None}] * args.vectors
+
+    print(f"{'config':>32} {'build s':>8} {'QPS':>8} {'recall@' + str(args.k):>10} {'index MB':>9}")
+    for label, quantization, m, ef_construction, ef, oversample in CONFIGS:
+        if m is not None:
+            vs.HNSW_M, vs.HNSW_EF_CONSTRUCTION, vs.HNSW_EF = m, ef_construction, ef
+        if oversample is not None:
+            vs.RESCORE_OVERSAMPLE = oversample
+
+        ns = vs.Namespace("bench", quantization=quantization)
+        start = time.perf_counter()
+        ns.add(docs, data)
+        build = time.perf_counter() - start
+
+        found = []
+        start = time.perf_counter()
+        for query in queries:
+            labels, _ = ns.search(query[None, :], args.k)
+            found.append(labels[0])
+        qps = args.queries / (time.perf_counter() - start)
+
+        recall = np.mean([len(set(map(int, f)) & set(t)) / args.k for f, t in zip(found, truth)])
+        print(f"{label:>32} {build:>8.1f} {qps:>8.0f} {recall:>10.3f} {index_bytes(ns) / 2 ** 20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Measures how long the backend takes to start with warmup disabled: importing
+app.py in a fresh interpreter, and launching the server until it accepts
+connections and answers /healthz. Also lists the slowest imports of app.py.
+
+    python benchmarks/bench_startup.py --server flask --runs 3 --budget 1.0
+
+Startup must not depend on network access or on the size of the vector store:
+everything slow is deferred to first use or to warmup. The run fails if the
+median import time or the median time to a /healthz answer exceeds the budget.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def command(server, port):
+    if server == "asgi":
+        return [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(port)]
+    return [sys.executable, "app.py", "--port", str(port)]
+
+
+def import_seconds():
+    """
+    Seconds to import app in a new interpreter, with nothing of it cached in the process.
+    """
+    env = {**os.environ, "WARMUP_ON_START": "0"}
+    code = "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_ready(server, timeout):
+    """
+    Seconds from launching the server until it binds its port and until /healthz answers.
+    """
+    port = free_port()
+    env = {**os.environ, "WARMUP_ON_START": "0", "PORT": str(port)}
+    start = time.perf_counter()
+    process = subprocess.Popen(command(server, port), cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        bound = None
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with {process.returncode}:\n{process.stderr.read().decode()[-2000:]}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.1):
+                    bound = time.perf_counter() - start
+                    break
+            except OSError:
+                time.sleep(0.01)
+        if bound is None:
+            raise RuntimeError(f"server did not bind within {timeout}s")
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=timeout) as response:
+            assert response.status == 200
+        return bound, time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def slowest_imports(count):
+    """
+    The modules with the largest cumulative import time when importing app, from python -X importtime.
+    """
+    env = {**os.environ, "WARMUP_ON_START": "0"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.rstrip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["flask", "asgi"], default="flask")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds allowed until /healthz answers")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--imports", type=int, default=10, help="how many of the slowest imports to list")
+    args = parser.parse_args()
+
+    imported = statistics.median(import_seconds() for _ in range(args.runs))
+    results = [time_to_ready(args.server, args.timeout) for _ in range(args.runs)]
+    bound = statistics.median(r[0] for r in results)
+    healthy = statistics.median(r[1] for r in results)
+
+    print(f"{args.server} server, median of {args.runs} runs, warmup disabled")
+    print(f"  import app:      {imported:6.3f}s (budget {args.budget:.1f}s)")
+    print(f"  port bound:      {bound:6.3f}s")
+    print(f"  /healthz answer: {healthy:6.3f}s (budget {args.budget:.1f}s)")
+    print("slowest imports of app.py (cumulative):")
+    for cumulative, name in slowest_imports(args.imports):
+        print(f"  {cumulative / 1e6:6.3f}s {name}")
+
+    if imported > args.budget:
+        raise SystemExit(f"importing app took {imported:.3f}s, over the {args.budget:.1f}s budget")
+    if healthy > args.budget:
+        raise SystemExit(f"startup took {healthy:.3f}s, over the {args.budget:.1f}s budget")
+
+
+if __name__ == "__main__":
+    main()
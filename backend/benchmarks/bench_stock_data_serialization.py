@@ -0,0 +1,81 @@
+"""
+Compares payload size and serialization time of the /stock_data output formats.
+
+    python benchmarks/bench_stock_data_serialization.py --bars 1260 100000
+
+"legacy" is the original per-row dict loop followed by json.dumps; the others
+use serialization.format_bars plus the records, columnar and Arrow encoders.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from serialization import format_bars, to_arrow_ipc, to_columnar_json, to_records_json
+
+
+def synthetic_bars(count):
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.standard_normal(count))
+    index = pd.date_range("2000-01-03", periods=count, freq="min", name="Date")
+    return pd.DataFrame({
+        "Open": close + rng.standard_normal(count) * 0.1,
+        "High": close + 0.5,
+        "Low": close - 0.5,
+        "Close": close,
+        "Adj Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, count),
+    }, index=index)
+
+
+def legacy(data):
+    data_dict = data.reset_index().to_dict('records')
+    formatted_data = [{
+        'date': record['Date'].strftime('%Y-%m-%d'),
+        'open': record['Open'],
+        'high': record['High'],
+        'low': record['Low'],
+        'price': int(record['Close']*100)/100,
+        'volume': record['Volume']
+    } for record in data_dict]
+    return json.dumps(formatted_data).encode("utf-8")
+
+
+def timed(function, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function(data)
+        best = min(best, time.perf_counter() - start)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, nargs="+", default=[1260, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    encoders = {
+        "legacy": legacy,
+        "records": lambda data: to_records_json(format_bars(data)),
+        "columnar": lambda data: to_columnar_json(format_bars(data)),
+        "arrow": lambda data: to_arrow_ipc(format_bars(data)),
+    }
+
+    print(f"{'bars':>8} {'format':>9} {'ms':>9} {'bytes':>12}")
+    for count in args.bars:
+        data = synthetic_bars(count)
+        for name, encoder in encoders.items():
+            seconds, size = timed(encoder, data, args.repeat)
+            print(f"{count:>8} {name:>9} {seconds * 1000:>9.1f} {size:>12,}")
+
+
+if __name__ == "__main__":
+    main()
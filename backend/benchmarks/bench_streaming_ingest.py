@@ -0,0 +1,100 @@
+"""
+Compares time to first searchable chunk and total time for ingesting one ticker,
+batch (Vectorstore.add_documents) vs. streaming (IngestionPipeline).
+
+    python benchmarks/bench_streaming_ingest.py --documents 60 --fetch-ms 50 --embed-ms 200
+
+Retrievers and the Cohere client are fakes that sleep for the given latencies,
+so the timings show how the stages overlap rather than real network speed.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COHERE_API_KEY", "benchmark")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "embedding_cache.sqlite"))
+
+import numpy as np
+
+import vectorstore as vs
+from ingestion import IngestionPipeline
+
+
+class SlowCohere:
+    def __init__(self, embed_seconds):
+        self.embed_seconds = embed_seconds
+        self.rng = np.random.default_rng(0)
+        self.lock = threading.Lock()
+
+    def embed(self, texts, model, input_type):
+        time.sleep(self.embed_seconds)
+        with self.lock:
+            vectors = self.rng.standard_normal((len(texts), vs.EMBED_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return SimpleNamespace(embeddings=vectors.tolist())
+
+
+def slow_source(name, documents, sections, fetch_seconds):
+    """
+    A retriever that takes fetch_seconds per document and yields them one at a time.
+    """
+    for i in range(documents):
+        time.sleep(fetch_seconds)
+        yield {
+            "title": f"{name} document {i}",
+            "text": "\n\n".join(f"{name} document {i} section {j}: revenue, margins and guidance" for j in range(sections)),
+        }
+
+
+def first_searchable(store, namespace, started):
+    while namespace not in store.namespaces:
+        time.sleep(0.001)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=60, help="documents per retriever (three retrievers)")
+    parser.add_argument("--sections", type=int, default=10, help="chunks per document")
+    parser.add_argument("--fetch-ms", type=float, default=50)
+    parser.add_argument("--embed-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    vs.co = SlowCohere(args.embed_ms / 1000)
+    names = ["filings", "benzinga", "yahoo"]
+
+    def sources():
+        return [lambda name=name: slow_source(name, args.documents, args.sections, args.fetch_ms / 1000) for name in names]
+
+    print(f"{'mode':>10} {'first chunk s':>14} {'total s':>9} {'chunks':>8}")
+    for mode in ("batch", "streaming"):
+        # Separate caches so the second run does not reuse the first run's embeddings
+        vs.embedding_cache = vs.EmbeddingCache(os.path.join(tempfile.mkdtemp(), f"{mode}.sqlite"))
+        store = vs.Vectorstore()
+        namespace = f"TICK-{mode}"
+        results = []
+        started = time.perf_counter()
+        watcher = threading.Thread(target=lambda: results.append(first_searchable(store, namespace, started)))
+        watcher.start()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            if mode == "batch":
+                documents = [document for source in sources() for document in source()]
+                store.add_documents(documents, namespace=namespace)
+            else:
+                IngestionPipeline(store, namespace).run(sources())
+        total = time.perf_counter() - started
+        watcher.join()
+
+        print(f"{mode:>10} {results[0]:>14.2f} {total:>9.2f} {len(store.namespaces[namespace]):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Measures local ticker resolutions per second and how often the LLM fallback would be needed.
+
+    python benchmarks/bench_ticker_resolver.py --seconds 5
+
+Uses the SEC company-tickers table from data/ (downloaded on first run). Before
+timing, it checks the resolver against CASES over a small fixed table and fails on
+any wrong answer.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ticker_resolver import TickerResolver
+
+MESSAGES = [
+    "What is the latest news on Apple?",
+    "How did NVDA do last quarter?",
+    "Tell me about Nvidia earnings",
+    "Is Microsoft a buy right now?",
+    "Should I buy $TSLA before earnings?",
+    "What's Berkshire Hathaway's cash pile?",
+    "Netflix subscriber growth this year",
+    "Walmart Q3 results",
+    "Tell me about Palantir",
+    "What is my price target for AAPL",
+    "Compare Apple and Microsoft",
+    "Explain P/E ratios",
+]
+
+# A few SEC rows, including tickers that are also everyday words
+COMPANIES = [
+    {"ticker": "AAPL", "title": "Apple Inc."},
+    {"ticker": "MSFT", "title": "MICROSOFT CORP"},
+    {"ticker": "NVDA", "title": "NVIDIA CORP"},
+    {"ticker": "BAC", "title": "Bank of America Corp"},
+    {"ticker": "LOW", "title": "LOWES COMPANIES INC"},
+    {"ticker": "KEY", "title": "KEYCORP /NEW/"},
+    {"ticker": "CASH", "title": "Pathward Financial, Inc."},
+    {"ticker": "TGT", "title": "TARGET CORP"},
+    {"ticker": "NWSA", "title": "News Corp"},
+]
+
+# Message -> expected ticker, None meaning the LLM fallback
+CASES = {
+    "What are the KEY risks for Apple?": "AAPL",
+    "How much CASH does Apple have": "AAPL",
+    "Why is the market LOW today": None,
+    "Is NVDA or Apple the better buy?": None,
+    "How did NVDA do last quarter?": "NVDA",
+    "Should I buy $LOW before earnings?": "LOW",
+    "Nvidia (NVDA) price target": "NVDA",
+    "What is the latest news on Apple?": "AAPL",
+    "latest news": None,
+    "stock market outlook": None,
+    "Compare Apple and Microsoft": None,
+    "Tell me about Bank of America": "BAC",
+    "What is my price target for AAPL": "AAPL",
+}
+
+
+def check_cases():
+    resolver = TickerResolver(COMPANIES)
+    wrong = [(message, expected, resolver.resolve(message)) for message, expected in CASES.items()]
+    wrong = [case for case in wrong if case[1] != case[2]]
+    for message, expected, got in wrong:
+        print(f"  {message!r:45} -> {got or 'LLM fallback'}, expected {expected or 'LLM fallback'}")
+    if wrong:
+        raise SystemExit(f"{len(wrong)} of {len(CASES)} resolver cases wrong")
+    print(f"All {len(CASES)} resolver cases correct")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    check_cases()
+    start = time.perf_counter()
+    resolver = TickerResolver.from_sec()
+    print(f"Built resolver over {len(resolver.tickers)} tickers and {len(resolver.names)} names in {time.perf_counter() - start:.2f}s")
+
+    for message in MESSAGES:
+        print(f"  {message!r:45} -> {resolver.resolve(message) or 'LLM fallback'}")
+
+    resolutions = 0
+    fallbacks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        for message in MESSAGES:
+            if resolver.resolve(message) is None:
+                fallbacks += 1
+            resolutions += 1
+    elapsed = time.perf_counter() - start
+
+    print(f"{resolutions / elapsed:,.0f} resolutions/s, {fallbacks / resolutions:.0%} would fall back to the LLM")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures heap bytes per chunk for the original chunk representation (a dict per
+chunk plus a list of Python floats per embedding) and the compact one
+(ChunkStore plus a float32 matrix).
+
+    python benchmarks/bench_vectorstore_memory.py --chunks 5000
+
+Sizes are taken with tracemalloc, so they cover Python allocations only; the
+HNSW graph is the same in both and not included.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from chunk_store import ChunkStore
+
+EMBED_DIM = 1024
+
+
+def synthetic_chunks(count, chunks_per_document=20):
+    words = "revenue margin guidance quarter growth segment operating cash flow outlook".split()
+    return [
+        {
+            "title": f"Form 10-Q filed on 2024-{i // chunks_per_document % 12 + 1:02d}-01 number {i // chunks_per_document}",
+            "text": " ".join(words[(i + j) % len(words)] for j in range(80)),
+            "url": f"https://www.sec.gov/Archives/edgar/data/{i // chunks_per_document}.htm",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    vectors = np.random.default_rng(0).standard_normal((args.chunks, EMBED_DIM)).astype(np.float32)
+
+    def original():
+        docs = [dict(chunk, text=str(chunk["text"])) for chunk in chunks]
+        embs = vectors.tolist()
+        return docs, embs
+
+    def compact():
+        store = ChunkStore()
+        store.extend(chunks)
+        embs = np.array(vectors, dtype=np.float32)
+        return store, embs
+
+    print(f"{'representation':>15} {'MB':>9} {'bytes/chunk':>12}")
+    for name, build in (("original", original), ("compact", compact)):
+        size, _ = measure(build)
+        print(f"{name:>15} {size / 2 ** 20:>9.1f} {size / args.chunks:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
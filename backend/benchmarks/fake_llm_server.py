@@ -0,0 +1,109 @@
+"""
+Local stand-in for the Perplexity chat completions API, for exercising /chat
+without network access or API cost.
+
+    python benchmarks/fake_llm_server.py --port 8090 --tokens 200 --token-delay-ms 20
+    PERPLEXITY_BASE_URL=http://127.0.0.1:8090 python app.py
+
+Answers POST /chat/completions in the OpenAI format, streamed as server-sent
+events when the request sets "stream": true. Each token takes --token-delay-ms
+to "generate", so a blocking request waits for all of them.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CITATIONS = ["https://example.com/filing", "https://example.com/news"]
+
+
+def completion_handler(tokens: int, token_delay: float, first_token_delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/chat/completions":
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = body.get("model", "fake")
+            words = [f"token{i} " for i in range(tokens)]
+
+            if body.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                time.sleep(first_token_delay)
+                for i, word in enumerate(words):
+                    if i:
+                        time.sleep(token_delay)
+                    self._write_chunk({
+                        "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "citations": CITATIONS,
+                        "choices": [{"index": 0, "delta": {"role": "assistant", "content": word}, "finish_reason": None}],
+                    })
+                self._write_chunk({
+                    "id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "citations": CITATIONS,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                })
+                self._write_raw(b"data: [DONE]\n\n")
+                self._write_raw(b"")
+                return
+
+            time.sleep(first_token_delay + token_delay * max(tokens - 1, 0))
+            payload = json.dumps({
+                "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "citations": CITATIONS,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(words)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _write_chunk(self, chunk: dict) -> None:
+            self._write_raw(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        def _write_raw(self, data: bytes) -> None:
+            # One HTTP/1.1 chunk, flushed straight away so the client sees each token as it is produced
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_server(port: int = 0, tokens: int = 200, token_delay: float = 0.02, first_token_delay: float = 0.3) -> ThreadingHTTPServer:
+    """
+    Starts the fake server on a daemon thread; port 0 picks a free port (see server.server_address).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), completion_handler(tokens, token_delay, first_token_delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-delay-ms", type=float, default=20)
+    parser.add_argument("--first-token-delay-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.tokens, args.token_delay_ms / 1000, args.first_token_delay_ms / 1000)
+    print(f"Fake LLM server listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Keeps item numbers, form names and tickers whole: "1a", "10-k", "brk.b", "7a"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Incremental inverted index with Okapi BM25 scoring.
+
+    Documents are identified by their position, like the labels in the vector
+    index, and can only be appended. Each term's postings are two parallel
+    int32 arrays (document ids and term frequencies).
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_lengths = array("i")
+        self.total_length = 0
+        # Kept up to date by add() so memory_bytes() does not walk every posting list
+        self.postings_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, texts: List[str]) -> None:
+        for text in texts:
+            doc_id = len(self.doc_lengths)
+            tokens = tokenize(text)
+            for term, frequency in Counter(tokens).items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = (array("i"), array("i"))
+                    self.postings_bytes += 120 + len(term)
+                postings[0].append(doc_id)
+                postings[1].append(frequency)
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+            self.postings_bytes += 8 * len(set(tokens))
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the ids and scores of the k best matching documents, best first.
+        Documents sharing no term with the query are not returned.
+        """
+        count = len(self.doc_lengths)
+        if not count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        # Copies rather than views: an exported buffer would stop the arrays from growing during a concurrent add
+        doc_lengths = np.array(self.doc_lengths, dtype=np.int32)[:count]
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / (self.total_length / count))
+        scores = np.zeros(count, dtype=np.float32)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            doc_ids = np.array(postings[0], dtype=np.int32)
+            frequencies = np.array(postings[1], dtype=np.float32)
+            # Postings appended after count was read are left out
+            n = min(len(doc_ids), len(frequencies))
+            keep = doc_ids[:n] < count
+            doc_ids, frequencies = doc_ids[:n][keep], frequencies[:n][keep]
+            if not len(doc_ids):
+                continue
+            idf = math.log(1 + (count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            scores[doc_ids] += idf * frequencies * (BM25_K1 + 1) / (frequencies + length_norm[doc_ids])
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = matched[np.argsort(-scores[matched])]
+        return order, scores[order]
+
+    def memory_bytes(self) -> int:
+        return self.postings_bytes + 4 * len(self.doc_lengths)
+
+    def save(self, path: str) -> None:
+        terms = list(self.postings)
+        lengths = np.array([len(self.postings[term][0]) for term in terms], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        doc_ids = np.concatenate([np.array(self.postings[term][0], dtype=np.int32) for term in terms]) if terms else np.empty(0, np.int32)
+        frequencies = np.concatenate([np.array(self.postings[term][1], dtype=np.int32) for term in terms]) if terms else np.empty(0, np.int32)
+        with open(os.path.join(path, "bm25_terms.json"), "w") as f:
+            json.dump(terms, f)
+        np.savez(
+            os.path.join(path, "bm25.npz"),
+            offsets=offsets,
+            doc_ids=doc_ids,
+            frequencies=frequencies,
+            doc_lengths=np.array(self.doc_lengths, dtype=np.int32),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        index = cls()
+        with open(os.path.join(path, "bm25_terms.json")) as f:
+            terms = json.load(f)
+        with np.load(os.path.join(path, "bm25.npz")) as arrays:
+            offsets, doc_ids, frequencies = arrays["offsets"], arrays["doc_ids"], arrays["frequencies"]
+            for i, term in enumerate(terms):
+                start, end = offsets[i], offsets[i + 1]
+                index.postings[term] = (array("i", doc_ids[start:end].tobytes()), array("i", frequencies[start:end].tobytes()))
+                index.postings_bytes += 120 + len(term)
+            index.postings_bytes += 8 * len(doc_ids)
+            index.doc_lengths = array("i", arrays["doc_lengths"].tobytes())
+        index.total_length = sum(index.doc_lengths)
+        return index
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "bm25.npz"))
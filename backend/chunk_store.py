@@ -0,0 +1,109 @@
+import json
+import os
+from array import array
+from typing import Dict, Iterator, List, Set, Tuple
+
+import numpy as np
+
+
+class ChunkSource:
+    """
+    Title and URL shared by every chunk cut from the same document.
+    """
+
+    __slots__ = ("title", "url")
+
+    def __init__(self, title: str, url: str = None):
+        self.title = title
+        self.url = url
+
+
+class ChunkStore:
+    """
+    Compact, append-only storage for a namespace's chunks.
+
+    All chunk text lives in one UTF-8 buffer indexed by an offsets array, and
+    each chunk points at a shared ChunkSource instead of carrying its own dict.
+    A loaded store memory-maps its text file, so text is only paged in for the
+    chunks that are actually read; the first append copies it into memory.
+
+    store[i] returns the chunk as a {"title", "text", "url"} dict.
+    """
+
+    def __init__(self):
+        self.text = bytearray()
+        # offsets[i]:offsets[i + 1] is chunk i's text
+        self.offsets = array("q", [0])
+        self.source_ids = array("i")
+        self.sources: List[ChunkSource] = []
+        self._source_index: Dict[Tuple[str, str], int] = {}
+        # Kept up to date as sources are added so memory_bytes() does not walk them
+        self.sources_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self.source_ids)
+
+    def __getitem__(self, i: int) -> Dict[str, str]:
+        source = self.sources[self.source_ids[i]]
+        return {
+            "title": source.title,
+            "text": bytes(self.text[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8"),
+            "url": source.url,
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        return (self[i] for i in range(len(self)))
+
+    def titles(self) -> Set[str]:
+        return {source.title for source in self.sources}
+
+    def extend(self, chunks: List[Dict[str, str]]) -> None:
+        if not isinstance(self.text, bytearray):
+            self.text = bytearray(self.text)
+        for chunk in chunks:
+            key = (chunk.get("title"), chunk.get("url"))
+            source_id = self._source_index.get(key)
+            if source_id is None:
+                source_id = len(self.sources)
+                self.sources.append(ChunkSource(*key))
+                self._source_index[key] = source_id
+                self.sources_bytes += self._source_bytes(*key)
+            self.text += chunk["text"].encode("utf-8")
+            self.offsets.append(len(self.text))
+            self.source_ids.append(source_id)
+
+    def memory_bytes(self) -> int:
+        """
+        Heap used by the store; a memory-mapped text buffer is file-backed and not counted.
+        """
+        text = len(self.text) if isinstance(self.text, bytearray) else 0
+        return text + self.offsets.itemsize * len(self.offsets) + self.source_ids.itemsize * len(self.source_ids) + self.sources_bytes
+
+    @staticmethod
+    def _source_bytes(title: str, url: str) -> int:
+        return 96 + len(title or "") + len(url or "")
+
+    def save(self, path: str) -> None:
+        with open(os.path.join(path, "text.bin"), "wb") as f:
+            f.write(self.text)
+        np.save(os.path.join(path, "offsets.npy"), np.array(self.offsets, dtype=np.int64))
+        np.save(os.path.join(path, "source_ids.npy"), np.array(self.source_ids, dtype=np.int32))
+        with open(os.path.join(path, "sources.jsonl"), "w") as f:
+            for source in self.sources:
+                f.write(json.dumps([source.title, source.url]) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "ChunkStore":
+        store = cls()
+        store.offsets = array("q", np.load(os.path.join(path, "offsets.npy")).tobytes())
+        store.source_ids = array("i", np.load(os.path.join(path, "source_ids.npy")).tobytes())
+        with open(os.path.join(path, "sources.jsonl")) as f:
+            for line in f:
+                title, url = json.loads(line)
+                store._source_index[(title, url)] = len(store.sources)
+                store.sources.append(ChunkSource(title, url))
+                store.sources_bytes += store._source_bytes(title, url)
+        # An empty file cannot be memory-mapped
+        if store.offsets[-1]:
+            store.text = np.memmap(os.path.join(path, "text.bin"), dtype=np.uint8, mode="r")
+        return store
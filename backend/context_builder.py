@@ -0,0 +1,109 @@
+import math
+import os
+import re
+import threading
+from typing import Dict, List, Tuple
+
+# Tokens of retrieved context added to the chat prompt, and the most any single chunk may take of that
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+CONTEXT_MAX_CHUNK_TOKENS = int(os.getenv("CONTEXT_MAX_CHUNK_TOKENS", "600"))
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+# A chunk cut down to fewer tokens than this is left out rather than included as a fragment
+CONTEXT_MIN_CHUNK_TOKENS = 48
+# Used to estimate token counts when the tokenizer cannot be loaded
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """
+    The tiktoken encoding, loaded on first use; None if tiktoken or its encoding file is unavailable.
+    """
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(CONTEXT_TOKENIZER)
+            except Exception as e:
+                print(f"Tokenizer unavailable, estimating token counts instead: {e}")
+                _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    encoding = get_encoding()
+    if encoding is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def build_context(
+    documents: List[Dict[str, str]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    max_chunk_tokens: int = CONTEXT_MAX_CHUNK_TOKENS,
+) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Turns retrieved chunks into a compact prompt section that fits a token budget.
+
+    Chunks with the same text are kept once, and the rest are taken best score first.
+    Each chunk is cut to max_chunk_tokens and added while the budget lasts; one that would
+    have to be cut below CONTEXT_MIN_CHUNK_TOKENS is skipped for shorter ones. The kept
+    chunks are grouped under their source with a citation ID:
+
+        [1] Title (url)
+        chunk text
+
+    Returns the context and the cited sources as [{"id", "title", "url"}].
+    """
+    ranked = sorted(enumerate(documents), key=lambda item: (-item[1].get("score", 0.0), item[0]))
+
+    seen = set()
+    selected = []
+    used = 0
+    for _, doc in ranked:
+        if used >= token_budget:
+            break
+        text = re.sub(r"\s+", " ", doc["text"]).strip()
+        if not text or text.lower() in seen:
+            continue
+        seen.add(text.lower())
+
+        # Every chunk is charged for a source header, so grouping can only come in under budget
+        header_tokens = count_tokens(f"[00] {doc.get('title') or ''} ({doc.get('url') or ''})\n")
+        allowed = min(max_chunk_tokens, token_budget - used - header_tokens)
+        # A chunk that does not fit is skipped rather than cut to a fragment; a shorter one further down may still fit
+        if count_tokens(text) > allowed:
+            if allowed < CONTEXT_MIN_CHUNK_TOKENS:
+                continue
+            text = truncate_tokens(text, allowed)
+        used += header_tokens + count_tokens(text) + 1
+        selected.append((doc, text))
+
+    sources = []
+    chunks_by_source = {}
+    for doc, text in selected:
+        key = (doc.get("title"), doc.get("url"))
+        if key not in chunks_by_source:
+            chunks_by_source[key] = []
+            sources.append({"id": len(sources) + 1, "title": doc.get("title"), "url": doc.get("url")})
+        chunks_by_source[key].append(text)
+
+    sections = []
+    for source in sources:
+        header = f"[{source['id']}] {source['title'] or 'Untitled'}"
+        if source["url"]:
+            header += f" ({source['url']})"
+        sections.append("\n".join([header, *chunks_by_source[(source["title"], source["url"])]]))
+
+    return "\n\n".join(sections), sources
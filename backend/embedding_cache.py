@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join("data", "embedding_cache.sqlite"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+EMBED_BATCH_SIZE = 90
+
+
+def cache_key(model: str, input_type: str, text: str) -> bytes:
+    """
+    Content address of an embedding: sha256 over model name, input type and text.
+    """
+    return hashlib.sha256(f"{model}\x00{input_type}\x00{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded on-disk store of float32 embeddings keyed by content hash.
+
+    Vectors are stored as raw float32 bytes in a single SQLite file. When the
+    total payload goes over `max_bytes` the least recently used vectors are
+    evicted until the cache is back under 90% of the budget.
+    """
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = 0
+        self._conn = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened on first use so importing the vectorstore does not create the database
+        if self._conn is None:
+            with self._connect_lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        conn.commit()
+        self.total_bytes = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+        return conn
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Returns the cached vectors for the given keys, skipping misses.
+        """
+        found = {}
+        keys = list(set(keys))
+        now = time.time()
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[bytes(key)] = np.frombuffer(vector, dtype=np.float32)
+                self.conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})", [now, *batch]
+                )
+            self.conn.commit()
+        return found
+
+    def put_many(self, items: Dict[bytes, Sequence[float]]) -> None:
+        """
+        Stores vectors as float32 and evicts old entries if the budget is exceeded.
+        """
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items.items()]
+        with self.lock:
+            placeholders = ",".join("?" * len(rows))
+            replaced = self.conn.execute(
+                f"SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings WHERE key IN ({placeholders})",
+                [row[0] for row in rows],
+            ).fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self.total_bytes += sum(len(row[1]) for row in rows) - replaced
+            if self.total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self.conn.commit()
+
+    def _evict(self, target_bytes: int) -> None:
+        cursor = self.conn.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used ASC")
+        evicted = []
+        for key, size in cursor:
+            if self.total_bytes <= target_bytes:
+                break
+            evicted.append((key,))
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        print(f"Evicted {len(evicted)} embeddings from the cache.")
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+def embed_texts(client, cache: EmbeddingCache, texts: List[str], model: str, input_type: str,
+                batch_size: int = EMBED_BATCH_SIZE) -> List[List[float]]:
+    """
+    Embeds texts through the cache, sending only cache misses to the Cohere API in batches.
+    """
+    keys = [cache_key(model, input_type, text) for text in texts]
+    vectors = cache.get_many(keys)
+
+    # Identical chunks (boilerplate, repeated headers) are only sent once
+    misses = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors and key not in misses:
+            misses[key] = text
+
+    print(f"Embedding cache: {len(texts) - len(misses)} hits, {len(misses)} misses.")
+
+    miss_keys = list(misses)
+    for i in range(0, len(miss_keys), batch_size):
+        batch_keys = miss_keys[i : i + batch_size]
+        embeddings = client.embed(
+            texts=[misses[key] for key in batch_keys], model=model, input_type=input_type
+        ).embeddings
+        new_vectors = dict(zip(batch_keys, embeddings))
+        cache.put_many(new_vectors)
+        vectors.update({key: np.asarray(vector, dtype=np.float32) for key, vector in new_vectors.items()})
+
+    return [vectors[key].tolist() for key in keys]
@@ -0,0 +1,243 @@
+"""
+Local store of parsed 10-Q/10-K financial statements.
+
+    python financials_store.py AAPL MSFT NVDA --periods 8
+
+Run as a script it backfills the latest filings for the given tickers.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+FINANCIALS_STORE_DIR = os.getenv("FINANCIALS_STORE_DIR", os.path.join("data", "financials"))
+# How long a ticker's filing list is trusted before EDGAR is asked for newer filings
+FINANCIALS_LISTING_TTL_SECONDS = int(os.getenv("FINANCIALS_LISTING_TTL_SECONDS", str(6 * 60 * 60)))
+FINANCIALS_WORKERS = int(os.getenv("FINANCIALS_WORKERS", "4"))
+DEFAULT_PERIODS = 8
+
+STATEMENTS = ("income_statement", "balance_sheet", "cash_flow_statement")
+FINANCIALS_COLUMNS = ["accession_number", "form", "filing_date", "statement", "column", "line_item", "value"]
+
+
+class FinancialsUnavailable(Exception):
+    """
+    EDGAR could not be reached, or a filing that exists could not be parsed.
+    """
+
+
+def _json_default(value):
+    # numpy scalars and timestamps from the statement frames
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def normalize_statements(financials: dict) -> dict:
+    """
+    Statements with string columns and line items and JSON values, as they read back from the store.
+    """
+    return {
+        statement: {
+            str(column): {str(line_item): json.loads(json.dumps(value, default=_json_default)) for line_item, value in values.items()}
+            for column, values in financials.get(statement, {}).items()
+        }
+        for statement in STATEMENTS
+    }
+
+
+def filing_period(filing: dict) -> dict:
+    """
+    Filing metadata with the calendar year and quarter of its filing date, which is how /earnings_report picks a filing.
+    """
+    filing_date = pd.Timestamp(filing["filing_date"])
+    return {
+        "accession_number": filing["accession_number"],
+        "form": filing["form"],
+        "filing_date": filing_date.strftime("%Y-%m-%d"),
+        "year": filing_date.year,
+        "quarter": filing_date.quarter,
+    }
+
+
+class FinancialsStore:
+    """
+    Parsed financial statements per ticker and filing, one Parquet file per ticker.
+
+    Statements are stored in long form (one row per statement, column and line
+    item) and rebuilt into the {statement: {column: {line item: value}}} dicts
+    that /earnings_report returns when a ticker is first read, so repeat lookups
+    are dictionary hits. Filings are parsed from EDGAR the first time they are
+    asked for, or ahead of time by backfill().
+
+    list_filings(ticker) returns a DataFrame of accession_number, form and
+    filing_date; fetch_financials(accession_number) returns the statements.
+    """
+
+    def __init__(
+        self,
+        list_filings: Callable[[str], pd.DataFrame],
+        fetch_financials: Callable[[str], dict],
+        path: str = FINANCIALS_STORE_DIR,
+        workers: int = FINANCIALS_WORKERS,
+    ):
+        self.list_filings = list_filings
+        self.fetch_financials = fetch_financials
+        self.path = path
+        self.workers = workers
+        # ticker -> accession number -> filing metadata plus its statements
+        self.reports: Dict[str, Dict[str, dict]] = {}
+        # ticker -> (listed_at, filing metadata newest first)
+        self.listings: Dict[str, tuple] = {}
+        self.locks: Dict[str, threading.Lock] = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self.locks_lock:
+            return self.locks.setdefault(ticker, threading.Lock())
+
+    def _file(self, ticker: str) -> str:
+        return os.path.join(self.path, f"{ticker}.parquet")
+
+    def _read(self, ticker: str) -> Dict[str, dict]:
+        if ticker in self.reports:
+            return self.reports[ticker]
+        reports = {}
+        if os.path.exists(self._file(ticker)):
+            data = pd.read_parquet(self._file(ticker))
+            for row in data.itertuples(index=False):
+                report = reports.get(row.accession_number)
+                if report is None:
+                    report = reports[row.accession_number] = filing_period(row._asdict())
+                report.setdefault(row.statement, {}).setdefault(row.column, {})[row.line_item] = json.loads(row.value)
+        self.reports[ticker] = reports
+        return reports
+
+    def _write(self, ticker: str, new_reports: List[dict]) -> None:
+        rows = []
+        for report in new_reports:
+            for statement in STATEMENTS:
+                for column, values in report.get(statement, {}).items():
+                    for line_item, value in values.items():
+                        rows.append((
+                            report["accession_number"], report["form"], report["filing_date"],
+                            statement, str(column), str(line_item), json.dumps(value, default=_json_default),
+                        ))
+        data = pd.DataFrame(rows, columns=FINANCIALS_COLUMNS)
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._file(ticker)):
+            data = pd.concat([pd.read_parquet(self._file(ticker)), data], ignore_index=True)
+        tmp_file = self._file(ticker) + ".tmp"
+        data.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, self._file(ticker))
+
+    def filings(self, ticker: str) -> List[dict]:
+        """
+        The ticker's 10-Q/10-K filings, newest first, listed from EDGAR at most once per TTL.
+        """
+        listed = self.listings.get(ticker)
+        if listed is None or time.time() - listed[0] >= FINANCIALS_LISTING_TTL_SECONDS:
+            try:
+                filings = [filing_period(filing) for filing in self.list_filings(ticker).to_dict("records")]
+            except Exception as e:
+                raise FinancialsUnavailable(f"Could not list filings of {ticker}: {e}") from e
+            listed = self.listings[ticker] = (time.time(), filings)
+        return listed[1]
+
+    def _ensure(self, ticker: str, filings: List[dict]) -> Dict[str, dict]:
+        """
+        Parses and stores whichever of these filings are not stored yet; returns the ticker's reports.
+        """
+        with self._lock_for(ticker):
+            reports = self._read(ticker)
+            missing = [filing for filing in filings if filing["accession_number"] not in reports]
+            if not missing:
+                return reports
+
+            print(f"Parsing {len(missing)} financial statements for {ticker}...")
+
+            def fetch(filing):
+                try:
+                    return {**filing, **normalize_statements(self.fetch_financials(filing["accession_number"]))}
+                except Exception as e:
+                    print(f"Error parsing financials of {filing['accession_number']}: {e}")
+                    return None
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                new_reports = [report for report in executor.map(fetch, missing) if report is not None]
+            if new_reports:
+                self._write(ticker, new_reports)
+                for report in new_reports:
+                    reports[report["accession_number"]] = report
+            return reports
+
+    def report(self, ticker: str, year: int, quarter: int) -> Optional[dict]:
+        """
+        Statements of the 10-Q (or 10-K for quarter 4) filed in the given calendar quarter, or None if there is none.
+        Raises FinancialsUnavailable when EDGAR fails or the filing cannot be parsed.
+        """
+        ticker = ticker.upper()
+        form = "10-K" if quarter == 4 else "10-Q"
+
+        def matching(filings):
+            return [f for f in filings if f["form"] == form and f["year"] == year and f["quarter"] == quarter]
+
+        # Stored filings are answered without listing EDGAR; a filing date is enough to pick the newest match
+        stored = sorted(matching(self._read(ticker).values()), key=lambda f: f["filing_date"], reverse=True)
+        if stored:
+            filing = stored[0]
+        else:
+            listed = matching(self.filings(ticker))
+            if not listed:
+                return None
+            filing = listed[0]
+
+        report = self._ensure(ticker, [filing]).get(filing["accession_number"])
+        if report is None:
+            raise FinancialsUnavailable(f"Could not parse the {form} {filing['accession_number']} of {ticker}")
+        return {statement: report.get(statement, {}) for statement in STATEMENTS}
+
+    def latest(self, ticker: str, periods: int = DEFAULT_PERIODS) -> List[dict]:
+        """
+        Metadata and statements of the latest `periods` 10-Q/10-K filings, newest first.
+        """
+        ticker = ticker.upper()
+        filings = self.filings(ticker)[:periods]
+        reports = self._ensure(ticker, filings)
+        return [reports[filing["accession_number"]] for filing in filings if filing["accession_number"] in reports]
+
+    def backfill(self, tickers: List[str], periods: int = DEFAULT_PERIODS) -> Dict[str, int]:
+        """
+        Parses the latest filings of each ticker ahead of time; returns how many periods each now has stored.
+        """
+        stored = {}
+        for ticker in tickers:
+            try:
+                stored[ticker] = len(self.latest(ticker, periods))
+            except Exception as e:
+                print(f"Error backfilling financials for {ticker}: {e}")
+                stored[ticker] = 0
+        return stored
+
+
+def create_store() -> FinancialsStore:
+    import info_retriever as ir
+
+    return FinancialsStore(ir.list_financial_filings, ir.get_filing_financials)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--periods", type=int, default=DEFAULT_PERIODS)
+    args = parser.parse_args()
+
+    for ticker, count in create_store().backfill([t.upper() for t in args.tickers], args.periods).items():
+        print(f"{ticker}: {count} periods stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import random
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "64"))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "20"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF_SECONDS = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+HTTP_MAX_BACKOFF_SECONDS = 30.0
+
+# Statuses worth another attempt; anything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """
+    Shared, pooled HTTP client for every outbound fetch (news APIs, scraped pages, article HTML).
+
+    Requests run on one asyncio event loop in a background thread, so all callers
+    share the same keep-alive connections. At most max_per_host requests are in
+    flight per host, and connection errors, timeouts, 429s and 5xxs are retried
+    with exponential backoff and jitter (honouring Retry-After).
+
+    Synchronous code calls get(), get_many(), submit() or run(); async code can await request().
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_per_host: int = HTTP_MAX_PER_HOST,
+        timeout: float = HTTP_TIMEOUT_SECONDS,
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_BACKOFF_SECONDS,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+        self.retries = retries
+        self.backoff = backoff
+        self.host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.loop = None
+        self.client = None
+        self.start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        # The loop thread is only started on first use so importing this module stays cheap
+        with self.start_lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="http-client", daemon=True).start()
+                self.client = asyncio.run_coroutine_threadsafe(self._create_client(), loop).result()
+                self.loop = loop
+        return self.loop
+
+    async def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        # Only touched from the loop thread, so no lock is needed
+        host = urlsplit(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self.host_limits[host]
+
+    def _backoff_seconds(self, attempt: int, response: httpx.Response = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), HTTP_MAX_BACKOFF_SECONDS)
+        return min(self.backoff * 2 ** attempt, HTTP_MAX_BACKOFF_SECONDS) * (0.5 + random.random())
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Sends one request through the shared pool, retrying transient failures.
+        The last response (even a failing one) is returned; the last exception is raised.
+        """
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with self._host_limit(url):
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException):
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self._backoff_seconds(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+            await asyncio.sleep(self._backoff_seconds(attempt, response))
+
+    def submit(self, method: str, url: str, **kwargs) -> Future:
+        """
+        Starts a request without waiting for it; returns a concurrent.futures.Future of the response.
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(self.request(method, url, **kwargs), loop)
+
+    def run(self, coroutine):
+        """
+        Runs a coroutine that awaits request() on the client's loop and returns its result.
+        """
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def get(self, url: str, **kwargs) -> httpx.Response:
+        return self.submit("GET", url, **kwargs).result()
+
+    def get_many(self, urls: List[str], **kwargs) -> List[Union[httpx.Response, Exception]]:
+        """
+        Fetches every URL concurrently (within the per-host limit), in input order.
+        A request that fails for good is returned as its exception rather than raised.
+        """
+        futures = [self.submit("GET", url, **kwargs) for url in urls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+http_client = HttpClient()
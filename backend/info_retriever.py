@@ -1,20 +1,101 @@
-from edgar import Company, find, set_identity, get_filings
 import pandas as pd
 import datetime as dt
 from dotenv import load_dotenv
 import os
-import requests
+import gzip
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from http_client import http_client
+from news_store import NewsStore, AlpacaNewsFeed
 
 load_dotenv()
 IDENTITY = os.getenv("EDGAR_EMAIL")
-set_identity(IDENTITY)
 
 print("FILING RETRIEIVER LOADED")
 
+# SEC fair-access policy allows at most 10 requests per second per client
+SEC_REQUESTS_PER_SECOND = float(os.getenv("SEC_REQUESTS_PER_SECOND", "8"))
+FILING_WORKERS = int(os.getenv("FILING_WORKERS", "4"))
+FILING_CACHE_DIR = os.getenv("FILING_CACHE_DIR", os.path.join("data", "filings"))
+
+
+_edgar = None
+_edgar_lock = threading.Lock()
+
+
+def edgar():
+    """
+    Returns the edgartools module, importing it and setting the SEC identity on first use;
+    it takes seconds to import, so the server does not pay for it at startup.
+    """
+    global _edgar
+    with _edgar_lock:
+        if _edgar is None:
+            import edgar as module
+
+            module.set_identity(IDENTITY)
+            _edgar = module
+    return _edgar
+
+
+class RateLimiter:
+    """
+    Spaces out calls across threads so no more than `rate` start per second.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class FilingCache:
+    """
+    Parsed item sections per accession number, stored as gzipped JSON.
+    Filings never change once accepted, so entries never expire.
+    """
+
+    def __init__(self, path=FILING_CACHE_DIR):
+        self.path = path
+
+    def _file(self, accession_number):
+        return os.path.join(self.path, f"{accession_number}.json.gz")
+
+    def get(self, accession_number):
+        try:
+            with gzip.open(self._file(accession_number), "rt") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, accession_number, filing):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_file = self._file(accession_number) + ".tmp"
+        with gzip.open(tmp_file, "wt") as f:
+            json.dump(filing, f)
+        os.replace(tmp_file, self._file(accession_number))
+
+
+sec_rate_limiter = RateLimiter(SEC_REQUESTS_PER_SECOND)
+filing_cache = FilingCache()
+
 ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
 ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
 
+news_store = NewsStore()
+news_feed = AlpacaNewsFeed(news_store, ALPACA_API_KEY, ALPACA_SECRET_KEY)
+
 print("NEWS RETRIEVER LOADED")
 
 def get_top_thirteen_f_helper():
@@ -22,7 +103,7 @@ def get_top_thirteen_f_helper():
     year = dt.datetime.now().year
     # current quarter
     quarter = (dt.datetime.now().month - 1) // 3 + 1
-    filings = get_filings(form="13F-HR", year=year, quarter=quarter)
+    filings = edgar().get_filings(form="13F-HR", year=year, quarter=quarter)
     filings = filings.to_pandas()
     filings = filings[filings['company'].str.contains('PARAGON CAPITAL MANAGEMENT INC|BlackRock Inc.|STATE STREET CORP|VANGUARD GROUP INC|RENAISSANCE TECHNOLOGIES LLC', case=False)]
     # only select unique companies
@@ -33,7 +114,7 @@ def get_top_thirteen_f_helper():
     holdings = {}
     for company, accession in company_to_accession.items():
         print(f"Getting holdings for {company}")
-        holdings[company] = find(accession).obj().infotable.to_dict()
+        holdings[company] = edgar().find(accession).obj().infotable.to_dict()
         
     return holdings
 
@@ -42,24 +123,27 @@ thirteen_f_holdings = {}
 def get_top_thirteen_f():
     return thirteen_f_holdings if thirteen_f_holdings else {}
 
-def get_earnings_report(ticker, year, quarter):
-    report = "10-Q"
-    if quarter == 4:
-        report = "10-K"
-    
-    company = Company(ticker)
-    filings_df = company.get_filings(form=report).to_pandas()
+def list_financial_filings(ticker):
+    """
+    The company's 10-Q and 10-K filings as a DataFrame (accession_number, form, filing_date), newest first.
+    """
+    sec_rate_limiter.wait()
+    company = edgar().Company(ticker)
+    sec_rate_limiter.wait()
+    filings_df = company.get_filings(form=["10-Q", "10-K"]).to_pandas()
     filings_df["filing_date"] = pd.to_datetime(filings_df["filing_date"])
-    # check if the year is correct
-    filings_df = filings_df[filings_df["filing_date"].dt.year == year]
-    # check if the quarter is correct
-    filings_df = filings_df[filings_df["filing_date"].dt.quarter == quarter]
-    # print the year and quarter of the filing
-    print(filings_df["filing_date"].iloc[0].year)
-    print(filings_df["filing_date"].iloc[0].quarter)
-    # get financial report from the first filing's accession number
-    accession_number = filings_df["accession_number"].iloc[0]
-    filing = find(accession_number)
+    filings_df = filings_df[["accession_number", "form", "filing_date"]]
+    return filings_df.sort_values(by="filing_date", ascending=False, kind="stable")
+
+
+def get_filing_financials(accession_number):
+    """
+    Returns the income statement, balance sheet and cash flow statement of a 10-Q/10-K,
+    each as {column: {line item: value}}.
+    """
+    sec_rate_limiter.wait()
+    filing = edgar().find(accession_number)
+    sec_rate_limiter.wait()
     filing_financials = filing.obj()
     financials = {
         "income_statement": filing_financials.income_statement,
@@ -70,11 +154,29 @@ def get_earnings_report(ticker, year, quarter):
     for i in (financials):
         financials[i] = financials[i].to_dataframe().to_dict()
     
-    
     return financials
 
 
-def get_all_filings(ticker, start_date=None, end_date=None):
+def get_earnings_report(ticker, year, quarter):
+    report = "10-Q"
+    if quarter == 4:
+        report = "10-K"
+    
+    filings_df = list_financial_filings(ticker)
+    filings_df = filings_df[filings_df["form"] == report]
+    # check if the year is correct
+    filings_df = filings_df[filings_df["filing_date"].dt.year == year]
+    # check if the quarter is correct
+    filings_df = filings_df[filings_df["filing_date"].dt.quarter == quarter]
+    # get financial report from the most recent matching filing's accession number
+    accession_number = filings_df["accession_number"].iloc[0]
+    return get_filing_financials(accession_number)
+
+
+def iter_filings(ticker, start_date=None, end_date=None):
+    """
+    Yields one {"title", "text"} document per filing as soon as it (and every filing before it) is parsed.
+    """
     # if start_date is None set it to 1 year ago and end_date to today
     if start_date is None and end_date is None:
         end_date = dt.datetime.now()
@@ -82,8 +184,11 @@ def get_all_filings(ticker, start_date=None, end_date=None):
     
     print(f"Getting filings for {ticker} between {start_date} and {end_date}")
     
-    company = Company(ticker)
+    # Listing the company's filings is SEC traffic too, so it takes its turn with the per-filing fetches
+    sec_rate_limiter.wait()
+    company = edgar().Company(ticker)
     # get all 10-k, 10-q, 8-k (with press release) filings
+    sec_rate_limiter.wait()
     filings_df = company.get_filings(form=['10-K', '10-Q', '8-K']).to_pandas()
     
     # set date column to datetime
@@ -98,66 +203,82 @@ def get_all_filings(ticker, start_date=None, end_date=None):
     # sort by form and date
     filings_df.sort_values(by=["form", "filing_date"], inplace=True)
     
-    # initialize list to hold all documents
-    all_docs = []
-    
-    # iterate over all filings
-    for _, row in filings_df.iterrows():
-       filing = find(row["accession_number"])
-       filing_obj = filing.obj()
-       relevant_items = []
-       if filing.form == "10-K":
-           relevant_items = ['1', '1A', '5', '6', '7', '7A', '8', '10', '11']
-       elif filing.form == "10-Q":
-           relevant_items = ['1', '2', '3', '4', '1A', '5']
-       elif filing.form == "8-K":
+    # fetch and parse the filings concurrently; map keeps them in the sorted order
+    rows = list(filings_df.itertuples(index=False))
+    with ThreadPoolExecutor(max_workers=FILING_WORKERS) as executor:
+        extracted = executor.map(lambda row: get_filing_items(row.accession_number), rows)
+        for row, filing in zip(rows, extracted):
+           if filing is None:
+               continue
+           yield {
+            # The accession number keeps two filings of the same form on the same day apart
+            "title": f'Form {row.form} ({row.accession_number}), contains all stock information, very important filed on {row.filing_date}',
+            "accession_number": row.accession_number,
+            # "url": filing.document.url,
+            "text": "|".join(filing["items"].values())
+            }
+
+
+def get_all_filings(ticker, start_date=None, end_date=None):
+    return list(iter_filings(ticker, start_date, end_date))
+
+
+def get_filing_items(accession_number):
+    """
+    Returns {"form": ..., "items": {item: text}} for a filing, parsing it from EDGAR only the first time.
+    """
+    cached = filing_cache.get(accession_number)
+    if cached is not None:
+        return cached
+    
+    try:
+        sec_rate_limiter.wait()
+        filing = edgar().find(accession_number)
+        sec_rate_limiter.wait()
+        filing_obj = filing.obj()
+        relevant_items = []
+        if filing.form == "10-K":
+            relevant_items = ['1', '1A', '5', '6', '7', '7A', '8', '10', '11']
+        elif filing.form == "10-Q":
+            relevant_items = ['1', '2', '3', '4', '1A', '5']
+        elif filing.form == "8-K":
             relevant_items = filing_obj.items
             # remove the "Item " prefix
             relevant_items = [item[5:] for item in relevant_items]
-       all_docs.append({
-        "title": f'Form {row["form"]}, contains all stock information, very important filed on {row["filing_date"]}',
-        # "url": filing.document.url,
-        "text": "|".join([filing_obj["ITEM "+item] for item in relevant_items])
-        }) 
-       
-    return all_docs
+        items = {item: filing_obj["ITEM "+item] for item in relevant_items}
+    except Exception as e:
+        print(f"Error parsing filing {accession_number}: {e}")
+        return None
+    
+    filing = {"form": filing.form, "items": {item: text for item, text in items.items() if text}}
+    filing_cache.put(accession_number, filing)
+    return filing
 
 
 def get_benzinga_news(tickers, start_date=None, end_date=None):
+    """
+    Alpaca (Benzinga) articles about exactly these tickers between two YYYY-MM-DD dates (default: the last week).
+    Each ticker's feed is brought up to date incrementally and the articles are read from the local news store.
+    """
+    now = dt.datetime.now(dt.timezone.utc)
     if not start_date or not end_date:
-        end_date = dt.datetime.now().strftime("%Y-%m-%d")
-        start_date = (dt.datetime.now() - dt.timedelta(days=7)).strftime("%Y-%m-%d")
+        start = now - dt.timedelta(days=7)
+        end = now
+    else:
+        start = dt.datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=dt.timezone.utc)
+        # the end date is inclusive
+        end = dt.datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=dt.timezone.utc) + dt.timedelta(days=1)
     
     if isinstance(tickers, str):
         tickers = [tickers]
-    ticker_string = "%2C".join(tickers) if len(tickers) > 1 else tickers[0]
     
-    base_url = f"https://data.alpaca.markets/v1beta1/news?start={start_date}&end={end_date}&sort=desc&symbols={ticker_string}&limit=50&include_content=false"
-    headers = {
-        "accept": "application/json",
-        "APCA-API-KEY-ID": ALPACA_API_KEY,
-        "APCA-API-SECRET-KEY": ALPACA_SECRET_KEY
-    }
+    for ticker in tickers:
+        news_feed.update(ticker, start, end)
     
     all_news = []
-    next_page_token = None
-    
-    while True:
-        url = base_url
-        if next_page_token:
-            url += f"&page_token={next_page_token}"
-        
-        response = requests.get(url, headers=headers)
-        data = response.json()
-        
-        if 'news' in data:
-            for news in data['news']:
-                if set(news["symbols"]) == set(tickers):
-                    all_news.append({"title": news["headline"], "url": news["url"]})
-        
-        next_page_token = data.get('next_page_token')
-        if not next_page_token:
-            break
+    for news in news_store.articles(tickers[0], start, end):
+        if set(news["symbols"]) == set(tickers):
+            all_news.append({"title": news["headline"], "url": news["url"]})
     
     return all_news
 
@@ -170,7 +291,7 @@ def get_yahoo_news(ticker):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
     
-    response = requests.get(URL, headers=headers)
+    response = http_client.get(URL, headers=headers)
     soup = BeautifulSoup(response.text, 'html.parser')
     
     # body = soup.find('div', class_='filtered-stories x-large yf-ovk92u rulesBetween infiniteScroll')
@@ -0,0 +1,166 @@
+import os
+import queue
+import threading
+from typing import Callable, Iterable, List
+
+INGEST_FETCH_WORKERS = int(os.getenv("INGEST_FETCH_WORKERS", "3"))
+INGEST_CHUNK_WORKERS = int(os.getenv("INGEST_CHUNK_WORKERS", "4"))
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "2"))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "90"))
+# Bound on the documents waiting to be chunked; the other queues are sized from the batch size
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "32"))
+# A partial batch is embedded once no new chunk has arrived for this long
+INGEST_BATCH_WAIT_SECONDS = float(os.getenv("INGEST_BATCH_WAIT_SECONDS", "0.5"))
+
+# Sent down a queue once per downstream worker when a stage has finished
+_DONE = object()
+
+
+class IngestionPipeline:
+    """
+    Streams documents from retrievers into one Vectorstore namespace through bounded queues:
+
+        fetch -> chunk -> embed batch -> index add
+
+    Every stage has its own worker threads and blocks when the queue after it is
+    full, so a fast retriever cannot run ahead of the embedder and only a few
+    batches are held in memory at once. Chunks become searchable as soon as the
+    batch they were embedded in is indexed. Indexing is done by a single writer.
+
+    A source that fails to fetch, or a document or batch that fails to chunk, embed
+    or index, is logged and skipped; self.failures counts them so callers can
+    tell a complete ingestion from a partial one.
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        namespace: str,
+        fetch_workers: int = INGEST_FETCH_WORKERS,
+        chunk_workers: int = INGEST_CHUNK_WORKERS,
+        embed_workers: int = INGEST_EMBED_WORKERS,
+        batch_size: int = INGEST_EMBED_BATCH_SIZE,
+        queue_size: int = INGEST_QUEUE_SIZE,
+    ):
+        self.vectorstore = vectorstore
+        self.namespace = namespace
+        self.fetch_workers = fetch_workers
+        self.chunk_workers = chunk_workers
+        self.embed_workers = embed_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.documents_fetched = 0
+        self.chunks_indexed = 0
+        self.batches_indexed = 0
+        self.failures = 0
+        self._failures_lock = threading.Lock()
+
+    def run(self, sources: Iterable[Callable[[], Iterable]]) -> int:
+        """
+        Runs every source (a callable returning an iterable of documents) through
+        the pipeline and blocks until all of their chunks are indexed.
+        Returns the number of chunks indexed.
+        """
+        source_queue = queue.Queue()
+        for source in sources:
+            source_queue.put(source)
+        for _ in range(self.fetch_workers):
+            source_queue.put(_DONE)
+
+        documents = queue.Queue(maxsize=self.queue_size)
+        chunks = queue.Queue(maxsize=self.batch_size * self.embed_workers * 2)
+        batches = queue.Queue(maxsize=self.embed_workers * 2)
+
+        threads = (
+            self._start_stage("fetch", self._fetch, self.fetch_workers, source_queue, documents, self.chunk_workers)
+            + self._start_stage("chunk", self._chunk, self.chunk_workers, documents, chunks, self.embed_workers)
+            + self._start_stage("embed", self._embed, self.embed_workers, chunks, batches, 1)
+            + self._start_stage("index", self._index, 1, batches, None, 0)
+        )
+        for thread in threads:
+            thread.join()
+
+        print(f"Ingested {self.documents_fetched} documents as {self.chunks_indexed} chunks in {self.batches_indexed} batches into {self.namespace}, {self.failures} failures.")
+        return self.chunks_indexed
+
+    def _failed(self, message: str) -> None:
+        print(message)
+        with self._failures_lock:
+            self.failures += 1
+
+    def _start_stage(self, name: str, work: Callable, workers: int, inbox: queue.Queue, outbox: queue.Queue, downstream_workers: int) -> List[threading.Thread]:
+        """
+        Starts a stage's workers; the last one to finish tells every downstream worker to stop.
+        """
+        remaining = [workers]
+        lock = threading.Lock()
+
+        def loop():
+            try:
+                work(inbox, outbox)
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and outbox is not None:
+                    for _ in range(downstream_workers):
+                        outbox.put(_DONE)
+
+        threads = [
+            threading.Thread(target=loop, name=f"ingest-{self.namespace}-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _fetch(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while (source := inbox.get()) is not _DONE:
+            try:
+                for document in source():
+                    self.documents_fetched += 1
+                    # Page downloads start here so they overlap; the bounded queue caps how many are in flight
+                    outbox.put((document, self.vectorstore.prefetch(document)))
+            except Exception as e:
+                self._failed(f"Error fetching documents for {self.namespace}: {e}")
+
+    def _chunk(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while (item := inbox.get()) is not _DONE:
+            document, page = item
+            try:
+                for chunk in self.vectorstore.chunk_document(document, page):
+                    outbox.put(chunk)
+            except Exception as e:
+                self._failed(f"Error chunking document for {self.namespace}: {e}")
+
+    def _embed(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        done = False
+        while not done:
+            chunk = inbox.get()
+            if chunk is _DONE:
+                return
+            batch = [chunk]
+            while len(batch) < self.batch_size:
+                try:
+                    chunk = inbox.get(timeout=INGEST_BATCH_WAIT_SECONDS)
+                except queue.Empty:
+                    break
+                if chunk is _DONE:
+                    done = True
+                    break
+                batch.append(chunk)
+
+            try:
+                outbox.put((batch, self.vectorstore.embed(batch)))
+            except Exception as e:
+                self._failed(f"Error embedding {len(batch)} chunks for {self.namespace}: {e}")
+
+    def _index(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        while (item := inbox.get()) is not _DONE:
+            batch, embeddings = item
+            try:
+                self.vectorstore.add_chunks(batch, embeddings, self.namespace)
+                self.chunks_indexed += len(batch)
+                self.batches_indexed += 1
+            except Exception as e:
+                self._failed(f"Error indexing {len(batch)} chunks for {self.namespace}: {e}")
@@ -6,6 +6,7 @@ import cohere
 import datetime
 from pprint import pprint
 import json
+import threading
 import yfinance as yf
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
@@ -13,6 +14,8 @@ import hnswlib
 from typing import List, Dict
 from unstructured.partition.html import partition_html
 from unstructured.chunking.title import chunk_by_title
+from ticker_resolver import resolve_ticker
+from http_client import http_client
 
 
 load_dotenv()
@@ -28,19 +31,14 @@ perclient = openai.OpenAI(api_key=PERPLEXITY_API_KEY, base_url="https://api.perp
 def get_stock_ticker_and_range(prompt):
     today = datetime.datetime.now().strftime("%Y-%m-%d")
     
-    ticker = co.chat(
-        model="command-r-plus",
-        preamble="you are going to return only the ticker for the company that the user is asking about. The ticker should be formatted with MAX 4 characters and MIN 2 characters",
-        message=prompt,
-        connectors=[{"id": "web-search"}]
-    )
+    ticker = resolve_ticker(prompt, co)
     
-    pprint(ticker.text)
+    pprint(ticker)
     
     response = co.chat(
     model="command-r-plus",
     preamble=f"I want you to generate a JSON that represents a query that the user made about a company's stock with ticker, formatted with MAX 4 characters and MIN 2 characters, and the start and end date of the query formatted as YYYY-MM-DD. Today is going to be the date {today} if there is no end date known, do the last year.",
-    message=f"{prompt} this information will help you get the ticker: {ticker.text}", 
+    message=f"{prompt} this information will help you get the ticker: {ticker}", 
     response_format={
             "type": "json_object",
             "schema": {
@@ -96,7 +94,9 @@ class Vectorstore:
 
     def process_url_document(self, raw_document):
         try:
-            elements = partition_html(url=raw_document["url"], headers={"User-Agent": ir.IDENTITY})
+            response = http_client.get(raw_document["url"], headers={"User-Agent": ir.IDENTITY})
+            response.raise_for_status()
+            elements = partition_html(text=response.text)
             chunks = chunk_by_title(elements)
             return [
                 {
@@ -199,15 +199,26 @@ class Vectorstore:
 
         return docs_retrieved
 
-raw_documents = []
-
-print("Getting filings for ")
-raw_documents += ir.get_all_filings("NVDA")
-print("Getting Benzinga news for ")
-raw_documents += ir.get_benzinga_news("NVDA")
-print("Getting Yahoo news for ")
-raw_documents += ir.get_yahoo_news("NVDA")
-vectorstore = Vectorstore(raw_documents=raw_documents)
+_vectorstore = None
+_vectorstore_lock = threading.Lock()
+
+def get_vectorstore():
+    """
+    Returns the NVDA vectorstore, fetching and embedding its filings and news on first use.
+    """
+    global _vectorstore
+    with _vectorstore_lock:
+        if _vectorstore is None:
+            raw_documents = []
+
+            print("Getting filings for ")
+            raw_documents += ir.get_all_filings("NVDA")
+            print("Getting Benzinga news for ")
+            raw_documents += ir.get_benzinga_news("NVDA")
+            print("Getting Yahoo news for ")
+            raw_documents += ir.get_yahoo_news("NVDA")
+            _vectorstore = Vectorstore(raw_documents=raw_documents)
+    return _vectorstore
 
 def run_chatbot(message, chat_history=[]):
     print("Using perplexity to generate response...")
@@ -256,7 +267,7 @@ def run_chatbot(message, chat_history=[]):
         # Retrieve document chunks for each query
         documents = []
         for query in search_queries:
-            documents.extend(vectorstore.retrieve(query))
+            documents.extend(get_vectorstore().retrieve(query))
         print(documents)
 
         # Use document chunks to respond
@@ -0,0 +1,237 @@
+import asyncio
+import datetime as dt
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from http_client import http_client
+
+NEWS_STORE_PATH = os.getenv("NEWS_STORE_PATH", os.path.join("data", "news.sqlite"))
+ALPACA_NEWS_URL = "https://data.alpaca.markets/v1beta1/news"
+ALPACA_PAGE_LIMIT = 50
+# Wide ranges are split into at most this many windows, none shorter than NEWS_MIN_WINDOW
+NEWS_MAX_WINDOWS = int(os.getenv("NEWS_MAX_WINDOWS", "8"))
+NEWS_MIN_WINDOW = dt.timedelta(hours=6)
+# Articles can show up in the API a little after their created_at, so the newest edge is re-read
+NEWS_OVERLAP = dt.timedelta(minutes=10)
+
+
+def to_rfc3339(moment: dt.datetime) -> str:
+    return moment.astimezone(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def from_rfc3339(text: str) -> dt.datetime:
+    return dt.datetime.fromisoformat(text.replace("Z", "+00:00"))
+
+
+class NewsStore:
+    """
+    Local, deduplicated store of news articles by ticker, in one SQLite file.
+
+    Articles are keyed by their Alpaca ID, so re-fetching an overlapping window
+    never creates duplicates. For each ticker the store also remembers which time
+    range has been fetched and the newest article seen. Subscribers are called with
+    (ticker, new_articles) whenever articles that were not stored before arrive.
+    """
+
+    def __init__(self, path: str = NEWS_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.subscribers: List[Callable[[str, List[Dict]], None]] = []
+        self._conn = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened on first use so importing the app does not create the database
+        if self._conn is None:
+            with self._connect_lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY, headline TEXT, summary TEXT, url TEXT, source TEXT, "
+            "created_at TEXT NOT NULL, symbols TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS article_symbols ("
+            "symbol TEXT NOT NULL, id INTEGER NOT NULL, created_at TEXT NOT NULL, PRIMARY KEY (symbol, id))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS article_symbols_time ON article_symbols (symbol, created_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "ticker TEXT PRIMARY KEY, covered_from TEXT NOT NULL, covered_until TEXT NOT NULL, "
+            "newest_id INTEGER, newest_at TEXT)"
+        )
+        conn.commit()
+        return conn
+
+    def subscribe(self, callback: Callable[[str, List[Dict]], None]) -> None:
+        self.subscribers.append(callback)
+
+    def coverage(self, ticker: str) -> Optional[Tuple[dt.datetime, dt.datetime]]:
+        """
+        The (from, until) range already fetched for a ticker, or None if it has never been fetched.
+        """
+        with self.lock:
+            row = self.conn.execute("SELECT covered_from, covered_until FROM feeds WHERE ticker = ?", (ticker,)).fetchone()
+        return (from_rfc3339(row[0]), from_rfc3339(row[1])) if row else None
+
+    def add(self, ticker: str, articles: List[Dict], covered: Tuple[dt.datetime, dt.datetime] = None) -> List[Dict]:
+        """
+        Stores articles fetched for a ticker, extends its covered range, and returns
+        (and announces to subscribers) only the articles that were new.
+        """
+        new_articles = []
+        with self.lock:
+            for article in articles:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO articles (id, headline, summary, url, source, created_at, symbols) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (article["id"], article["headline"], article.get("summary"), article["url"], article.get("source"),
+                     article["created_at"], json.dumps(article["symbols"])),
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO article_symbols (symbol, id, created_at) VALUES (?, ?, ?)",
+                    [(symbol, article["id"], article["created_at"]) for symbol in article["symbols"]],
+                )
+                if cursor.rowcount:
+                    new_articles.append(article)
+
+            if covered is not None:
+                newest = max(articles, key=lambda article: (article["created_at"], article["id"]), default=None)
+                self.conn.execute(
+                    "INSERT INTO feeds (ticker, covered_from, covered_until, newest_id, newest_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (ticker) DO UPDATE SET "
+                    "covered_from = MIN(covered_from, excluded.covered_from), "
+                    "covered_until = MAX(covered_until, excluded.covered_until), "
+                    "newest_id = CASE WHEN excluded.newest_at > COALESCE(newest_at, '') THEN excluded.newest_id ELSE newest_id END, "
+                    "newest_at = MAX(COALESCE(newest_at, ''), COALESCE(excluded.newest_at, ''))",
+                    (ticker, to_rfc3339(covered[0]), to_rfc3339(covered[1]),
+                     newest["id"] if newest else None, newest["created_at"] if newest else None),
+                )
+            self.conn.commit()
+
+        if new_articles:
+            for callback in self.subscribers:
+                try:
+                    callback(ticker, new_articles)
+                except Exception as e:
+                    print(f"Error notifying news subscriber for {ticker}: {e}")
+        return new_articles
+
+    def articles(self, ticker: str, start: dt.datetime, end: dt.datetime) -> List[Dict]:
+        """
+        Articles mentioning a ticker created in [start, end), newest first.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT a.id, a.headline, a.summary, a.url, a.source, a.created_at, a.symbols "
+                "FROM article_symbols s JOIN articles a ON a.id = s.id "
+                "WHERE s.symbol = ? AND s.created_at >= ? AND s.created_at < ? ORDER BY s.created_at DESC, s.id DESC",
+                (ticker, to_rfc3339(start), to_rfc3339(end)),
+            ).fetchall()
+        return [
+            {"id": id, "headline": headline, "summary": summary, "url": url, "source": source,
+             "created_at": created_at, "symbols": json.loads(symbols)}
+            for id, headline, summary, url, source, created_at, symbols in rows
+        ]
+
+
+class AlpacaNewsFeed:
+    """
+    Incremental Alpaca news feed per ticker.
+
+    update() only requests the parts of a range the store has not covered yet
+    (normally just the time since the newest fetch), splits them into windows
+    that are paged through concurrently on the shared HTTP client, and hands the
+    results to the NewsStore.
+    """
+
+    def __init__(self, store: NewsStore, api_key: str, secret_key: str):
+        self.store = store
+        self.headers = {
+            "accept": "application/json",
+            "APCA-API-KEY-ID": api_key or "",
+            "APCA-API-SECRET-KEY": secret_key or "",
+        }
+        self.locks: Dict[str, threading.Lock] = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self.locks_lock:
+            return self.locks.setdefault(ticker, threading.Lock())
+
+    @staticmethod
+    def missing_ranges(start: dt.datetime, end: dt.datetime, coverage) -> List[Tuple[dt.datetime, dt.datetime]]:
+        """
+        Parts of [start, end) outside the covered range; ranges stay contiguous, so a
+        request past either edge fetches everything from that edge.
+        """
+        if coverage is None:
+            return [(start, end)] if start < end else []
+        covered_from, covered_until = coverage
+        ranges = []
+        if start < covered_from:
+            ranges.append((start, covered_from))
+        if end > covered_until:
+            ranges.append((covered_until - NEWS_OVERLAP, end))
+        return ranges
+
+    @staticmethod
+    def windows(start: dt.datetime, end: dt.datetime) -> List[Tuple[dt.datetime, dt.datetime]]:
+        count = max(1, min(NEWS_MAX_WINDOWS, int((end - start) / NEWS_MIN_WINDOW)))
+        step = (end - start) / count
+        return [(start + step * i, end if i == count - 1 else start + step * (i + 1)) for i in range(count)]
+
+    async def _fetch_window(self, ticker: str, start: dt.datetime, end: dt.datetime) -> List[Dict]:
+        articles = []
+        params = {
+            "symbols": ticker,
+            "start": to_rfc3339(start),
+            "end": to_rfc3339(end),
+            "sort": "desc",
+            "limit": ALPACA_PAGE_LIMIT,
+            "include_content": "false",
+        }
+        while True:
+            response = await http_client.request("GET", ALPACA_NEWS_URL, params=params, headers=self.headers)
+            response.raise_for_status()
+            data = response.json()
+            articles.extend(data.get("news") or [])
+            if not data.get("next_page_token"):
+                return articles
+            params["page_token"] = data["next_page_token"]
+
+    async def _fetch_ranges(self, ticker: str, ranges):
+        windows = [window for start, end in ranges for window in self.windows(start, end)]
+        return await asyncio.gather(*(self._fetch_window(ticker, start, end) for start, end in windows), return_exceptions=True)
+
+    def update(self, ticker: str, start: dt.datetime, end: dt.datetime) -> List[Dict]:
+        """
+        Makes sure the store has the ticker's articles for [start, end) and returns the ones that were new.
+        """
+        end = min(end, dt.datetime.now(dt.timezone.utc))
+        with self._lock_for(ticker):
+            ranges = self.missing_ranges(start, end, self.store.coverage(ticker))
+            if not ranges:
+                return []
+
+            results = http_client.run(self._fetch_ranges(ticker, ranges))
+            articles = [article for result in results if not isinstance(result, Exception) for article in result]
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                # Keep what arrived, but leave the coverage alone so the failed windows are fetched again
+                print(f"Error fetching news for {ticker}: {errors[0]}")
+                return self.store.add(ticker, articles)
+
+            covered = (min(start for start, _ in ranges), max(end for _, end in ranges))
+            return self.store.add(ticker, articles, covered)
@@ -0,0 +1,244 @@
+import datetime as dt
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", os.path.join("data", "prices"))
+PRICE_PROVIDER = os.getenv("PRICE_PROVIDER", "yfinance")
+PRICE_FIXTURE_DIR = os.getenv("PRICE_FIXTURE_DIR", os.path.join("data", "price_fixtures"))
+# How long a ticker that is missing bars (holidays, halted symbols) waits before asking upstream again
+PRICE_REFRESH_SECONDS = int(os.getenv("PRICE_REFRESH_SECONDS", str(15 * 60)))
+HISTORY_DAYS = 365 * 5
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+class PriceProvider:
+    """
+    Source of daily OHLCV bars. fetch() returns a DataFrame indexed by date
+    (named "Date") with PRICE_COLUMNS, covering start inclusive to end exclusive.
+    """
+
+    def fetch(self, ticker: str, start: dt.date, end: dt.date) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def fetch_many(self, tickers: List[str], start: dt.date, end: dt.date) -> Dict[str, pd.DataFrame]:
+        """
+        Bars for several tickers over the same range; tickers that could not be fetched are left out.
+        """
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.fetch(ticker, start, end)
+            except Exception as e:
+                print(f"Error fetching prices for {ticker}: {e}")
+        return frames
+
+
+class YFinanceProvider(PriceProvider):
+    def fetch(self, ticker: str, start: dt.date, end: dt.date) -> pd.DataFrame:
+        import yfinance as yf
+
+        data = yf.download(tickers=ticker, start=start, end=end, progress=False)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        return data
+
+    def fetch_many(self, tickers: List[str], start: dt.date, end: dt.date) -> Dict[str, pd.DataFrame]:
+        import yfinance as yf
+
+        # One download for every ticker; columns come back grouped as (ticker, field)
+        data = yf.download(tickers=tickers, start=start, end=end, progress=False, group_by="ticker", threads=True)
+        frames = {}
+        for ticker in tickers:
+            if not isinstance(data.columns, pd.MultiIndex):
+                frame = data
+            elif ticker in data.columns.get_level_values(0):
+                frame = data[ticker]
+            else:
+                continue
+            # Failed symbols come back as all-NaN columns
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                frames[ticker] = frame
+        return frames
+
+
+class FixtureProvider(PriceProvider):
+    """
+    Serves bars from local CSV files (<ticker>.csv with a Date column), for tests and offline development.
+    """
+
+    def __init__(self, fixture_dir: str = PRICE_FIXTURE_DIR, frames: Dict[str, pd.DataFrame] = None):
+        self.fixture_dir = fixture_dir
+        self.frames = frames or {}
+
+    def fetch(self, ticker: str, start: dt.date, end: dt.date) -> pd.DataFrame:
+        if ticker not in self.frames:
+            self.frames[ticker] = pd.read_csv(os.path.join(self.fixture_dir, f"{ticker}.csv"), index_col="Date", parse_dates=True)
+        data = self.frames[ticker]
+        return data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+
+def last_completed_session(today: dt.date) -> dt.date:
+    """
+    The most recent weekday before today, i.e. the last daily bar that can exist (holidays are not modelled).
+    """
+    day = today - dt.timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= dt.timedelta(days=1)
+    return day
+
+
+class PriceStore:
+    """
+    Local columnar store of daily bars, one Parquet file per ticker.
+
+    The first request for a ticker downloads its full history; after that only
+    the bars since the last stored date are fetched. Stored frames are also kept
+    in memory so repeat requests do not touch disk.
+    """
+
+    def __init__(self, provider: PriceProvider, path: str = PRICE_STORE_DIR):
+        self.provider = provider
+        self.path = path
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self.checked_at: Dict[str, float] = {}
+        self.locks: Dict[str, threading.Lock] = {}
+        self.locks_lock = threading.Lock()
+
+    def _lock_for(self, ticker: str) -> threading.Lock:
+        with self.locks_lock:
+            return self.locks.setdefault(ticker, threading.Lock())
+
+    def _file(self, ticker: str) -> str:
+        return os.path.join(self.path, f"{ticker}.parquet")
+
+    def _read(self, ticker: str) -> Optional[pd.DataFrame]:
+        if ticker not in self.frames and os.path.exists(self._file(ticker)):
+            self.frames[ticker] = pd.read_parquet(self._file(ticker))
+        return self.frames.get(ticker)
+
+    def _write(self, ticker: str, data: pd.DataFrame) -> None:
+        # Created on first write so importing the app leaves the filesystem alone
+        os.makedirs(self.path, exist_ok=True)
+        tmp_file = self._file(ticker) + ".tmp"
+        data.to_parquet(tmp_file)
+        os.replace(tmp_file, self._file(ticker))
+        self.frames[ticker] = data
+
+    @staticmethod
+    def _normalize(data: pd.DataFrame) -> pd.DataFrame:
+        data = data[[column for column in PRICE_COLUMNS if column in data.columns]]
+        data.index = pd.to_datetime(data.index).tz_localize(None)
+        data.index.name = "Date"
+        return data
+
+    def _fetch(self, ticker: str, start: dt.date, end: dt.date) -> pd.DataFrame:
+        return self._normalize(self.provider.fetch(ticker, start, end))
+
+    def _fetch_start(self, ticker: str, today: dt.date) -> Optional[dt.date]:
+        """
+        The date to fetch a ticker's bars from, or None if its stored bars are current.
+        """
+        stored = self._read(ticker)
+        if stored is None or stored.empty:
+            return today - dt.timedelta(days=HISTORY_DAYS)
+        last_date = stored.index.max().date()
+        recently_checked = time.time() - self.checked_at.get(ticker, 0) < PRICE_REFRESH_SECONDS
+        if last_date >= last_completed_session(today) or recently_checked:
+            return None
+        return last_date + dt.timedelta(days=1)
+
+    def _merge(self, ticker: str, fetched: pd.DataFrame) -> pd.DataFrame:
+        """
+        Stores freshly fetched bars for a ticker and returns all its bars.
+        """
+        stored = self._read(ticker)
+        self.checked_at[ticker] = time.time()
+        if stored is None or stored.empty:
+            print(f"Downloaded price history for {ticker}.")
+            self._write(ticker, fetched)
+            return fetched
+        fetched = fetched[fetched.index > stored.index.max()]
+        if not fetched.empty:
+            print(f"Appending {len(fetched)} new bars for {ticker}...")
+            stored = pd.concat([stored, fetched])
+            stored = stored[~stored.index.duplicated(keep="last")].sort_index()
+            self._write(ticker, stored)
+        return stored
+
+    def refresh(self, ticker: str) -> pd.DataFrame:
+        """
+        Brings the stored bars for a ticker up to the last completed session and returns them.
+        """
+        with self._lock_for(ticker):
+            today = dt.date.today()
+            start = self._fetch_start(ticker, today)
+            if start is None:
+                return self._read(ticker)
+            return self._merge(ticker, self._fetch(ticker, start, today))
+
+    def refresh_many(self, tickers: List[str]) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """
+        Brings several tickers up to date, downloading every ticker that needs the same
+        range in one provider call. Each ticker maps to its bars or to the error it hit.
+        """
+        today = dt.date.today()
+        results = {}
+        starts: Dict[dt.date, List[str]] = {}
+        for ticker in tickers:
+            with self._lock_for(ticker):
+                start = self._fetch_start(ticker, today)
+            if start is None:
+                results[ticker] = self._read(ticker)
+            else:
+                starts.setdefault(start, []).append(ticker)
+
+        for start, group in starts.items():
+            print(f"Downloading prices for {len(group)} tickers from {start}...")
+            try:
+                fetched = self.provider.fetch_many(group, start, today)
+            except Exception as e:
+                results.update({ticker: e for ticker in group})
+                continue
+            for ticker in group:
+                with self._lock_for(ticker):
+                    if ticker in fetched:
+                        results[ticker] = self._merge(ticker, self._normalize(fetched[ticker]))
+                    else:
+                        # Nothing new (e.g. a holiday) is fine as long as bars are already stored
+                        self.checked_at[ticker] = time.time()
+                        results[ticker] = self._read(ticker)
+                if results[ticker] is None or results[ticker].empty:
+                    results[ticker] = LookupError(f"No price data for {ticker}")
+        return results
+
+    def get(self, ticker: str, start: dt.date, end: dt.date) -> pd.DataFrame:
+        """
+        Returns the bars for a ticker between start inclusive and end exclusive.
+        """
+        data = self.refresh(ticker.upper())
+        return data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+
+    def get_many(self, tickers: List[str], start: dt.date, end: dt.date) -> Dict[str, Union[pd.DataFrame, Exception]]:
+        """
+        get() for several tickers at once; a ticker whose bars could not be loaded maps to its error.
+        """
+        results = self.refresh_many([ticker.upper() for ticker in tickers])
+        return {
+            ticker: data if isinstance(data, Exception) else data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+            for ticker, data in results.items()
+        }
+
+
+def create_provider() -> PriceProvider:
+    if PRICE_PROVIDER == "fixture":
+        return FixtureProvider()
+    return YFinanceProvider()
+
+
+price_store = PriceStore(create_provider())
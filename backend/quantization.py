@@ -0,0 +1,116 @@
+import os
+from typing import Tuple
+
+import numpy as np
+
+# Rows scored per block, so scoring never materialises a float copy of the whole code matrix
+SCORE_BLOCK_ROWS = 4096
+QUANTIZATION_KINDS = ("int8", "binary")
+
+# Number of set bits in every byte value, for Hamming distances over packed codes
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scales each vector so its largest component maps to +-127; returns (codes, per-vector scales).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    One sign bit per dimension, packed 8 to a byte.
+    """
+    return np.packbits(np.asarray(vectors).reshape(len(vectors), -1) > 0, axis=1)
+
+
+class QuantizedMatrix:
+    """
+    Growable int8 or binary codes for a set of embeddings, used to pick candidates
+    cheaply before they are re-scored against the float vectors.
+
+    int8 keeps a byte per dimension plus a scale per vector (4x smaller than float32);
+    binary keeps a bit per dimension (32x smaller) and ranks by Hamming distance.
+    """
+
+    def __init__(self, kind: str, dim: int):
+        if kind not in QUANTIZATION_KINDS:
+            raise ValueError(f"Unknown quantization {kind!r}, expected one of {QUANTIZATION_KINDS}")
+        self.kind = kind
+        self.dim = dim
+        width = dim if kind == "int8" else (dim + 7) // 8
+        self._codes = np.empty((0, width), dtype=np.int8 if kind == "int8" else np.uint8)
+        self._scales = np.empty(0, dtype=np.float32)
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[: self.count]
+
+    @property
+    def scales(self) -> np.ndarray:
+        return self._scales[: self.count]
+
+    @property
+    def nbytes(self) -> int:
+        return self._codes.nbytes + self._scales.nbytes
+
+    def append(self, vectors: np.ndarray) -> None:
+        if self.kind == "int8":
+            codes, scales = quantize_int8(vectors)
+        else:
+            codes, scales = quantize_binary(vectors), np.ones(len(vectors), dtype=np.float32)
+
+        end = self.count + len(codes)
+        if end > len(self._codes):
+            capacity = max(64, int(end * 1.5))
+            self._codes = np.concatenate([self.codes, np.empty((capacity - self.count, self._codes.shape[1]), dtype=self._codes.dtype)])
+            self._scales = np.concatenate([self.scales, np.empty(capacity - self.count, dtype=np.float32)])
+        self._codes[self.count:end] = codes
+        self._scales[self.count:end] = scales
+        self.count = end
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Approximate similarity of every query to every stored vector, shape (queries, count); higher is closer.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        scores = np.empty((len(queries), self.count), dtype=np.float32)
+        codes = self.codes
+        if self.kind == "int8":
+            scales = self.scales
+            for start in range(0, self.count, SCORE_BLOCK_ROWS):
+                block = slice(start, start + SCORE_BLOCK_ROWS)
+                scores[:, block] = (codes[block].astype(np.float32) @ queries.T).T * scales[block]
+        else:
+            query_codes = quantize_binary(queries)
+            for i, query_code in enumerate(query_codes):
+                for start in range(0, self.count, SCORE_BLOCK_ROWS):
+                    block = slice(start, start + SCORE_BLOCK_ROWS)
+                    hamming = POPCOUNT[np.bitwise_xor(codes[block], query_code)].sum(axis=1)
+                    scores[i, block] = self.dim - 2 * hamming.astype(np.float32)
+        return scores
+
+    def save(self, path: str) -> None:
+        np.save(os.path.join(path, f"codes_{self.kind}.npy"), self.codes)
+        np.save(os.path.join(path, f"scales_{self.kind}.npy"), self.scales)
+
+    @classmethod
+    def load(cls, path: str, kind: str, dim: int) -> "QuantizedMatrix":
+        matrix = cls(kind, dim)
+        matrix._codes = np.load(os.path.join(path, f"codes_{kind}.npy"))
+        matrix._scales = np.load(os.path.join(path, f"scales_{kind}.npy"))
+        matrix.count = len(matrix._codes)
+        return matrix
+
+    @staticmethod
+    def exists(path: str, kind: str) -> bool:
+        return os.path.exists(os.path.join(path, f"codes_{kind}.npy"))
@@ -0,0 +1,155 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "4096"))
+# Chat answers are reused for questions whose embeddings are at least this similar, for the same ticker
+CHAT_CACHE_SIMILARITY = float(os.getenv("CHAT_CACHE_SIMILARITY", "0.95"))
+CHAT_CACHE_TTL_SECONDS = int(os.getenv("CHAT_CACHE_TTL_SECONDS", str(15 * 60)))
+CHAT_CACHE_MAX_ENTRIES_PER_TICKER = int(os.getenv("CHAT_CACHE_MAX_ENTRIES_PER_TICKER", "256"))
+
+
+def normalize_query(query: str) -> str:
+    """
+    Lower-cased with whitespace collapsed and trailing punctuation dropped, so trivially different phrasings share a key.
+    """
+    return re.sub(r"\s+", " ", query.lower()).strip().rstrip("?!. ")
+
+
+class CacheMetrics:
+    """
+    Hit and miss counts plus the compute time saved by hits.
+
+    Each entry remembers how long it took to compute; a hit counts that time as saved.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def hit(self, compute_seconds: float) -> None:
+        with self.lock:
+            self.hits += 1
+            self.saved_seconds += compute_seconds
+
+    def miss(self) -> None:
+        with self.lock:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+class RetrievalCache:
+    """
+    LRU of retrieval results by exact key.
+
+    Keys include the version of whatever was searched, so results computed
+    before a namespace changed are simply never looked up again.
+    """
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.metrics = CacheMetrics()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None:
+            self.metrics.miss()
+            return None
+        value, compute_seconds = entry
+        self.metrics.hit(compute_seconds)
+        return value
+
+    def put(self, key: Hashable, value, compute_seconds: float) -> None:
+        with self.lock:
+            self.entries[key] = (value, compute_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = len(self.entries)
+        return {**self.metrics.stats(), "entries": entries}
+
+
+class SemanticCache:
+    """
+    Per-ticker cache of answers keyed on the question's embedding.
+
+    A lookup returns the answer to the most similar cached question if its
+    cosine similarity reaches the threshold and it has not expired.
+    """
+
+    def __init__(
+        self,
+        similarity: float = CHAT_CACHE_SIMILARITY,
+        ttl: float = CHAT_CACHE_TTL_SECONDS,
+        max_entries: int = CHAT_CACHE_MAX_ENTRIES_PER_TICKER,
+    ):
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # ticker -> list of (unit embedding, expires_at, value, compute_seconds), oldest first
+        self.entries: Dict[str, List[tuple]] = {}
+        self.metrics = CacheMetrics()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def get(self, ticker: str, embedding) -> Optional[dict]:
+        query = self._unit(embedding)
+        now = time.time()
+        with self.lock:
+            entries = [entry for entry in self.entries.get(ticker, []) if entry[1] > now]
+            self.entries[ticker] = entries
+            best = None
+            if entries:
+                similarities = np.stack([entry[0] for entry in entries]) @ query
+                i = int(np.argmax(similarities))
+                if similarities[i] >= self.similarity:
+                    best = entries[i]
+        if best is None:
+            self.metrics.miss()
+            return None
+        self.metrics.hit(best[3])
+        return best[2]
+
+    def put(self, ticker: str, embedding, value: dict, compute_seconds: float) -> None:
+        with self.lock:
+            entries = self.entries.setdefault(ticker, [])
+            entries.append((self._unit(embedding), time.time() + self.ttl, value, compute_seconds))
+            del entries[: -self.max_entries]
+
+    def invalidate(self, ticker: str) -> None:
+        with self.lock:
+            self.entries.pop(ticker, None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries = sum(len(entries) for entries in self.entries.values())
+        return {**self.metrics.stats(), "entries": entries}
@@ -0,0 +1,176 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+REFRESH_INTERVAL_SECONDS = int(os.getenv("REFRESH_INTERVAL_SECONDS", str(15 * 60)))
+REFRESH_TOP_N = int(os.getenv("REFRESH_TOP_N", "20"))
+REFRESH_WORKERS = int(os.getenv("REFRESH_WORKERS", "2"))
+# Global budgets over a sliding hour: refresh runs (API calls) and documents ingested (embedding cost)
+REFRESH_MAX_RUNS_PER_HOUR = int(os.getenv("REFRESH_MAX_RUNS_PER_HOUR", "120"))
+REFRESH_MAX_DOCUMENTS_PER_HOUR = int(os.getenv("REFRESH_MAX_DOCUMENTS_PER_HOUR", "2000"))
+# Popularity halves every half-life; tickers outside the top N that have been idle this long are evicted
+POPULARITY_HALF_LIFE_SECONDS = float(os.getenv("POPULARITY_HALF_LIFE_SECONDS", str(6 * 60 * 60)))
+REFRESH_EVICT_AFTER_SECONDS = int(os.getenv("REFRESH_EVICT_AFTER_SECONDS", str(6 * 60 * 60)))
+HOUR = 60 * 60
+
+
+class TickerPopularity:
+    """
+    Exponentially decayed request counts per ticker.
+    """
+
+    def __init__(self, half_life: float = POPULARITY_HALF_LIFE_SECONDS):
+        self.decay = math.log(2) / half_life
+        self.scores: Dict[str, float] = {}
+        self.last_seen: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def _decayed(self, ticker: str, now: float) -> float:
+        return self.scores.get(ticker, 0.0) * math.exp(-self.decay * (now - self.last_seen.get(ticker, now)))
+
+    def record(self, ticker: str) -> None:
+        now = time.time()
+        with self.lock:
+            self.scores[ticker] = self._decayed(ticker, now) + 1.0
+            self.last_seen[ticker] = now
+
+    def top(self, n: int) -> List[str]:
+        now = time.time()
+        with self.lock:
+            ranked = sorted(self.scores, key=lambda ticker: self._decayed(ticker, now), reverse=True)
+        return ranked[:n]
+
+    def idle_seconds(self, ticker: str) -> float:
+        with self.lock:
+            return time.time() - self.last_seen.get(ticker, 0.0)
+
+
+class Budget:
+    """
+    Sliding one-hour budget: spend() is refused once the last hour's total would go over the limit.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.spent = deque()
+        self.lock = threading.Lock()
+
+    def remaining(self) -> int:
+        with self.lock:
+            cutoff = time.time() - HOUR
+            while self.spent and self.spent[0][0] < cutoff:
+                self.spent.popleft()
+            return self.limit - sum(amount for _, amount in self.spent)
+
+    def spend(self, amount: int) -> None:
+        with self.lock:
+            self.spent.append((time.time(), amount))
+
+
+class RefreshScheduler:
+    """
+    Keeps the most requested tickers fresh in the background.
+
+    Every interval the top-N tickers by popularity that are already embedded and
+    have not been refreshed for an interval are handed to a worker pool, as long
+    as the hourly run and document budgets allow. refresh(ticker) does the work
+    and returns how many documents it ingested. Embedded tickers that have dropped
+    out of the top N and been idle for a while are passed to evict(ticker).
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[str], int],
+        evict: Callable[[str], bool],
+        embedded: Callable[[], set],
+        popularity: TickerPopularity = None,
+        interval: float = REFRESH_INTERVAL_SECONDS,
+        top_n: int = REFRESH_TOP_N,
+        workers: int = REFRESH_WORKERS,
+    ):
+        self.refresh = refresh
+        self.evict = evict
+        self.embedded = embedded
+        self.popularity = popularity or TickerPopularity()
+        self.interval = interval
+        self.top_n = top_n
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh")
+        self.run_budget = Budget(REFRESH_MAX_RUNS_PER_HOUR)
+        self.document_budget = Budget(REFRESH_MAX_DOCUMENTS_PER_HOUR)
+        self.refreshed_at: Dict[str, float] = {}
+        self.running = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def record(self, ticker: str) -> None:
+        """
+        Counts a request for a ticker towards its popularity.
+        """
+        if ticker:
+            self.popularity.record(ticker)
+
+    def mark_refreshed(self, ticker: str) -> None:
+        with self.lock:
+            self.refreshed_at[ticker] = time.time()
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+            self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+
+    def _loop(self) -> None:
+        # The first tick waits a full interval so startup is not slowed down
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Error in refresh scheduler: {e}")
+
+    def tick(self) -> List[str]:
+        """
+        Schedules the refreshes that are due and evicts cold tickers; returns the tickers scheduled.
+        """
+        embedded = self.embedded()
+        hot = [ticker for ticker in self.popularity.top(self.top_n) if ticker in embedded]
+        now = time.time()
+        scheduled = []
+
+        for ticker in hot:
+            with self.lock:
+                due = now - self.refreshed_at.get(ticker, 0) >= self.interval and ticker not in self.running
+            if not due:
+                continue
+            if self.run_budget.remaining() <= 0 or self.document_budget.remaining() <= 0:
+                print(f"Refresh budget exhausted, skipping {len(hot) - len(scheduled)} tickers this round")
+                break
+            with self.lock:
+                self.running.add(ticker)
+            self.run_budget.spend(1)
+            self.executor.submit(self._refresh, ticker)
+            scheduled.append(ticker)
+
+        for ticker in embedded:
+            if ticker not in hot and self.popularity.idle_seconds(ticker) >= REFRESH_EVICT_AFTER_SECONDS:
+                self.evict(ticker)
+
+        return scheduled
+
+    def _refresh(self, ticker: str) -> None:
+        try:
+            documents = self.refresh(ticker)
+            self.document_budget.spend(documents)
+            self.mark_refreshed(ticker)
+            print(f"Refreshed {ticker} with {documents} new documents")
+        except Exception as e:
+            print(f"Error refreshing {ticker}: {e}")
+        finally:
+            with self.lock:
+                self.running.discard(ticker)
@@ -0,0 +1,232 @@
+import datetime as dt
+import functools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from flask import Response, make_response, request
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", os.path.join("data", "response_cache.sqlite"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_CLOSE = dt.time(16, 0)
+
+
+def seconds_until_market_close(now: dt.datetime = None) -> float:
+    """
+    Seconds until the next weekday 4pm New York close, which is when daily bars change.
+    """
+    now = now or dt.datetime.now(MARKET_TIMEZONE)
+    close = dt.datetime.combine(now.date(), MARKET_CLOSE, tzinfo=MARKET_TIMEZONE)
+    if now >= close:
+        close += dt.timedelta(days=1)
+    while close.weekday() >= 5:
+        close += dt.timedelta(days=1)
+    # A few minutes of slack so the closing bar is published before we refetch
+    return (close - now).total_seconds() + 5 * MINUTE
+
+
+class MemoryBackend:
+    """
+    Per-process LRU of cached values with expiry times.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float) -> None:
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class SqliteBackend:
+    """
+    Cache shared by every worker on the host through a local SQLite file.
+    """
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self._conn = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # Opened on first use so importing the app does not create the database
+        if self._conn is None:
+            with self._connect_lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    def get(self, key: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: str, value, ttl: float) -> None:
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value), now + ttl),
+            )
+            self.conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+            self.conn.commit()
+
+
+class ResponseCache:
+    """
+    Caches computed values by key with request coalescing: while one caller
+    computes a missing key, concurrent callers for the same key wait for its result
+    instead of starting their own upstream fetch.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_compute(
+        self, key: str, ttl: Union[float, Callable[[], float]], compute: Callable, cacheable: Callable = lambda value: True
+    ):
+        """
+        Returns (value, "HIT" | "MISS" | "COALESCED"). A callable ttl is evaluated once
+        the value is computed, so a slow computation gets the TTL in force when it finishes.
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            with self.lock:
+                self.hits += 1
+            return value, "HIT"
+
+        with self.lock:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result(), "COALESCED"
+
+        try:
+            value = compute()
+            if cacheable(value):
+                self.backend.set(key, value, ttl() if callable(ttl) else ttl)
+            future.set_result(value)
+            return value, "MISS"
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
+
+
+def create_backend():
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        return SqliteBackend()
+    return MemoryBackend()
+
+
+response_cache = ResponseCache(create_backend())
+
+
+def normalize_args(args) -> str:
+    """
+    Canonical form of the query string: sorted keys, trimmed values, upper-cased and sorted tickers.
+    """
+    parts = []
+    for key in sorted(args):
+        value = args.get(key, "").strip()
+        if key in ("ticker", "tickers"):
+            value = ",".join(sorted(t.strip().upper() for t in value.split(",") if t.strip()))
+        parts.append(f"{key}={value}")
+    return "&".join(parts)
+
+
+def cached_endpoint(ttl: Union[float, Callable[[], float]], vary: Tuple[str, ...] = ()):
+    """
+    Caches a view's response body by endpoint and normalized query parameters.
+
+    ttl is either a number of seconds or a function returning one, evaluated
+    after the view has run, when the response is stored. Headers named in vary
+    (e.g. Accept) are part of the key. Only 200 responses are cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = f"{view.__name__}?{normalize_args(request.args)}"
+            for header in vary:
+                key += f"|{header}={request.headers.get(header, '')}"
+
+            def compute():
+                response = make_response(view(*args, **kwargs))
+                return response.get_data(), response.status_code, response.content_type
+
+            (body, status, content_type), source = response_cache.get_or_compute(
+                key,
+                ttl,
+                compute,
+                cacheable=lambda value: value[1] == 200,
+            )
+            response = Response(body, status=status, content_type=content_type)
+            response.headers["X-Cache"] = source
+            return response
+
+        return wrapper
+
+    return decorator
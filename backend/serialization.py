@@ -0,0 +1,83 @@
+import io
+import json
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+ARROW_STREAM_MIME = "application/vnd.apache.arrow.stream"
+JSON_MIME = "application/json"
+
+
+def format_bars(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turns raw OHLCV bars into the /stock_data shape with column operations only:
+    date strings, prices truncated to cents and integer volumes.
+    """
+    index = pd.DatetimeIndex(data.index)
+    return pd.DataFrame({
+        "date": index.strftime("%Y-%m-%d"),
+        "open": data["Open"].to_numpy(dtype=np.float64),
+        "high": data["High"].to_numpy(dtype=np.float64),
+        "low": data["Low"].to_numpy(dtype=np.float64),
+        "price": np.trunc(data["Close"].to_numpy(dtype=np.float64) * 100) / 100,
+        "volume": data["Volume"].fillna(0).to_numpy(dtype=np.int64),
+    })
+
+
+def to_records_json(bars: pd.DataFrame) -> bytes:
+    """
+    Row-oriented JSON array, the original /stock_data payload.
+    """
+    return bars.to_json(orient="records").encode("utf-8")
+
+
+def to_columnar_json(bars: pd.DataFrame) -> bytes:
+    """
+    {"date": [...], "open": [...], ...}: every key appears once instead of once per bar.
+    """
+    columns = {column: _column_values(bars[column]) for column in bars.columns}
+    return json.dumps(columns, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _column_values(series: pd.Series) -> list:
+    # Missing prices become null, as in the records output
+    if series.dtype.kind == "f" and series.isna().any():
+        return series.astype(object).where(series.notna(), None).tolist()
+    return series.tolist()
+
+
+def to_arrow_ipc(bars: pd.DataFrame) -> bytes:
+    """
+    Arrow IPC stream of the bars, for clients that can read binary columns directly.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(bars, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def serialize_bars(bars: pd.DataFrame, shape: str = "records", accept: str = "") -> Tuple[bytes, str]:
+    """
+    Picks the output format: Arrow IPC when the Accept header asks for it,
+    otherwise JSON in the requested shape ("records" or "columnar").
+    Returns the body and its content type.
+    """
+    if ARROW_STREAM_MIME in accept:
+        return to_arrow_ipc(bars), ARROW_STREAM_MIME
+    if shape == "columnar":
+        return to_columnar_json(bars), JSON_MIME
+    return to_records_json(bars), JSON_MIME
+
+
+def serialize_bars_batch(bars_by_ticker: Dict[str, pd.DataFrame], errors: Dict[str, str], shape: str = "records") -> bytes:
+    """
+    {"data": {ticker: bars}, "errors": {ticker: message}} as JSON, each ticker's bars in
+    the requested shape; the per-ticker bodies are spliced in rather than re-encoded.
+    """
+    encode = to_columnar_json if shape == "columnar" else to_records_json
+    data = b",".join(json.dumps(ticker).encode("utf-8") + b":" + encode(bars) for ticker, bars in bars_by_ticker.items())
+    return b'{"data":{' + data + b'},"errors":' + json.dumps(errors).encode("utf-8") + b"}"
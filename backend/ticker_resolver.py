@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from rapidfuzz import fuzz, process
+
+from http_client import http_client
+
+load_dotenv()
+IDENTITY = os.getenv("EDGAR_EMAIL")
+
+SEC_COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+COMPANY_TICKERS_PATH = os.getenv("COMPANY_TICKERS_PATH", os.path.join("data", "company_tickers.json"))
+COMPANY_TICKERS_MAX_AGE = 7 * 24 * 3600
+
+TICKER_PREAMBLE = "you are going to return only the ticker for the company that the user is asking about. The ticker should be formatted with MAX 4 characters and MIN 2 characters"
+
+# Names people use that do not match the SEC registrant name
+ALIASES = {
+    "google": "GOOGL",
+    "facebook": "META",
+    "instagram": "META",
+    "whatsapp": "META",
+    "berkshire": "BRK-B",
+    "berkshire hathaway": "BRK-B",
+    "jp morgan": "JPM",
+    "jpmorgan": "JPM",
+    "chase": "JPM",
+    "coke": "KO",
+    "coca cola": "KO",
+    "walmart": "WMT",
+    "disney": "DIS",
+    "tsmc": "TSM",
+    "amd": "AMD",
+    "ibm": "IBM",
+    "at&t": "T",
+    "s&p 500": "SPY",
+    "s&p": "SPY",
+}
+
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc", "llc",
+    "lp", "holdings", "holding", "group", "sa", "nv", "ag", "se", "com", "the", "class", "cl",
+}
+
+# Upper-case words that show up in questions, often for emphasis, but are rarely meant as
+# tickers; words in COMMON_WORDS are skipped too. "$LOW" still means Lowe's.
+TICKER_STOPWORDS = {
+    "A", "I", "AI", "IT", "ON", "OR", "AN", "AM", "ARE", "ALL", "ANY", "CAN", "CEO", "CFO", "EPS",
+    "ETF", "FOR", "GDP", "IPO", "NOW", "ONE", "SEC", "USA", "US", "YOU", "PE", "Q1", "Q2", "Q3", "Q4",
+    "BIG", "CASH", "DEBT", "DOWN", "FAST", "HIGH", "HOT", "KEY", "LOW", "MAIN", "MOST", "OUT", "REAL",
+    "RISK", "SAFE", "UP", "VERY", "WELL",
+}
+
+# Everyday words that are also one-word company names ("News Corp", "Target", "Stock Yards
+# Bancorp"); they are never matched as names, even when capitalised at the start of a sentence
+COMMON_WORDS = {
+    "about", "analysis", "bank", "best", "buy", "capital", "chart", "company", "compare", "data", "dividend",
+    "doing", "earnings", "energy", "equity", "estate", "financial", "first", "forecast", "fund", "future",
+    "general", "global", "gold", "good", "great", "growth", "guidance", "health", "hold", "income", "index",
+    "international", "invest", "investment", "latest", "market", "markets", "national", "new", "news", "next",
+    "oil", "outlook", "performance", "price", "prices", "real", "report", "revenue", "sell", "share", "shares",
+    "stock", "stocks", "target", "tech", "technology", "today", "top", "trade", "trading", "trend", "trust",
+    "united", "value", "week", "what", "when", "where", "which", "why", "year",
+}
+
+NAME_JOINERS = {"of", "and", "&", "the", "for"}
+
+# Candidates are scored by how they matched; resolve() needs a clear winner. An explicit
+# ticker ("$NVDA", "Nvidia (NVDA)") scores SYMBOL_SCORE. A capitalised multi-word name
+# scores NAME_SCORE, while a lower-case phrase or a single word scores WEAK_NAME_SCORE.
+# A bare upper-case word may just be emphasis ("the KEY risks"), so it scores below any name.
+SYMBOL_SCORE = 100.0
+NAME_SCORE = 95.0
+WEAK_NAME_SCORE = 90.0
+BARE_SYMBOL_SCORE = 85.0
+FUZZY_WEIGHT = 0.9
+FUZZY_SCORE_CUTOFF = 90
+MAX_NGRAM = 4
+
+
+def normalize_name(name: str) -> str:
+    """
+    Lowercases a company name and strips punctuation and corporate suffixes ("Apple Inc." -> "apple").
+    """
+    words = re.sub(r"[^a-z0-9& ]+", " ", name.lower()).split()
+    while words and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    while words and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+class TickerResolver:
+    """
+    In-memory lookup from ticker symbols, company names and aliases to tickers.
+
+    resolve() only answers when exactly one company matches with confidence;
+    otherwise it returns None and the caller should fall back to the LLM.
+    """
+
+    def __init__(self, companies: List[Dict[str, str]]):
+        self.tickers = set()
+        self.names: Dict[str, str] = {}
+
+        # The SEC table is ordered by market cap, so for duplicate names
+        # (share classes, renamed registrants) the larger listing wins
+        for company in companies:
+            ticker = company["ticker"].upper()
+            self.tickers.add(ticker)
+            name = normalize_name(company["title"])
+            if name:
+                self.names.setdefault(name, ticker)
+
+        # "Palantir" should find "palantir technologies": a distinctive first word
+        # becomes a name of its own when no other company starts with it
+        first_words: Dict[str, List[str]] = {}
+        for name, ticker in self.names.items():
+            first_words.setdefault(name.split()[0], []).append(ticker)
+        for word, tickers in first_words.items():
+            if len(word) >= 4 and len(set(tickers)) == 1:
+                self.names.setdefault(word, tickers[0])
+
+        for alias, ticker in ALIASES.items():
+            self.names[alias] = ticker
+        self.name_list = list(self.names)
+
+    @classmethod
+    def from_sec(cls, path: str = COMPANY_TICKERS_PATH) -> "TickerResolver":
+        """
+        Builds the resolver from the SEC company-tickers table, downloading it at most once a week.
+        """
+        if not os.path.exists(path) or time.time() - os.path.getmtime(path) > COMPANY_TICKERS_MAX_AGE:
+            print("Downloading SEC company tickers...")
+            response = http_client.get(SEC_COMPANY_TICKERS_URL, headers={"User-Agent": IDENTITY}, timeout=30)
+            response.raise_for_status()
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(response.text)
+
+        with open(path) as f:
+            table = json.load(f)
+        return cls(list(table.values()))
+
+    def candidates(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Returns every (ticker, score) the text could refer to, best first.
+        """
+        found, _, _ = self._match(text)
+        return sorted(found.items(), key=lambda item: -item[1])
+
+    def _match(self, text: str) -> Tuple[Dict[str, float], Set[str], Set[str]]:
+        """
+        Returns the best score per ticker, the tickers found only as bare upper-case
+        words, and the tickers found by company name.
+        """
+        found: Dict[str, float] = {}
+        explicit: Set[str] = set()
+        bare: Set[str] = set()
+        named: Set[str] = set()
+
+        def add(ticker, score):
+            found[ticker] = max(found.get(ticker, 0.0), score)
+
+        # Explicit symbols ("$NVDA", "(NVDA)"), then upper-case words that are listed tickers
+        for match in re.finditer(r"\$([A-Za-z][A-Za-z.\-]{0,5})|\(([A-Z][A-Z.\-]{0,5})\)|\b([A-Z][A-Z.\-]{0,5})\b", text):
+            symbol = next(group for group in match.groups() if group).upper().replace(".", "-")
+            if symbol not in self.tickers:
+                continue
+            if match.group(3) is None:
+                explicit.add(symbol)
+                add(symbol, SYMBOL_SCORE)
+            elif symbol not in TICKER_STOPWORDS and symbol.lower() not in COMMON_WORDS:
+                bare.add(symbol)
+                add(symbol, BARE_SYMBOL_SCORE)
+
+        words = re.sub(r"[^A-Za-z0-9& ]+", " ", text).split()
+        lowered = [word.lower() for word in words]
+        for n in range(MAX_NGRAM, 0, -1):
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(lowered[i : i + n])
+                # "Bank of America": joining words inside a name may stay lower-case
+                capitalised = words[i][0].isupper() and all(word[0].isupper() or word in NAME_JOINERS for word in words[i : i + n])
+                if phrase in self.names:
+                    if n == 1 and (not capitalised or phrase in COMMON_WORDS):
+                        continue
+                    named.add(self.names[phrase])
+                    add(self.names[phrase], NAME_SCORE if n > 1 and capitalised else WEAK_NAME_SCORE)
+                elif i > 0 and capitalised and len(phrase) > 3 and phrase not in COMMON_WORDS:
+                    # Only capitalised phrases past the first word are fuzzy matched; they are the likely company names
+                    match = process.extractOne(phrase, self.name_list, scorer=fuzz.ratio, score_cutoff=FUZZY_SCORE_CUTOFF)
+                    if match:
+                        named.add(self.names[match[0]])
+                        add(self.names[match[0]], match[1] * FUZZY_WEIGHT)
+
+        return found, bare - explicit, named
+
+    def resolve(self, text: str) -> Optional[str]:
+        """
+        Returns the ticker when the text clearly refers to a single company, else None.
+        """
+        found, bare, named = self._match(text)
+        # "How much CASH does Apple have": an upper-case word and a company name that
+        # disagree are left to the LLM rather than settled by score
+        if bare - named and named - bare:
+            return None
+        candidates = sorted(found.items(), key=lambda item: -item[1])
+        if len(candidates) == 1:
+            return candidates[0][0]
+        if len(candidates) > 1 and candidates[0][1] - candidates[1][1] >= SYMBOL_SCORE - NAME_SCORE:
+            return candidates[0][0]
+        return None
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> TickerResolver:
+    """
+    Returns the shared resolver, building it on first use. If the SEC table
+    cannot be loaded an empty resolver is used and every lookup falls back to the LLM.
+    """
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            try:
+                _resolver = TickerResolver.from_sec()
+            except Exception as e:
+                print(f"Error loading SEC company tickers: {e}")
+                _resolver = TickerResolver([])
+    return _resolver
+
+
+def resolve_ticker(message: str, co) -> str:
+    """
+    Resolves the ticker a message is about locally, asking the LLM only when the local match is missing or ambiguous.
+    """
+    ticker = get_resolver().resolve(message)
+    if ticker:
+        return ticker
+
+    print("Ticker is ambiguous locally, asking the LLM...")
+    response = co.chat(
+        model="command-r-plus",
+        preamble=TICKER_PREAMBLE,
+        message=message,
+        connectors=[{"id": "web-search"}]
+    )
+    return response.text.strip().upper()
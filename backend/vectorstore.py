@@ -0,0 +1,756 @@
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Union
+
+import cohere
+import hnswlib
+import numpy as np
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+from chunk_store import ChunkStore
+from embedding_cache import EmbeddingCache, embed_texts
+from bm25 import BM25Index
+from http_client import http_client
+from quantization import QuantizedMatrix
+from query_cache import RetrievalCache, normalize_query
+from rwlock import ReadWriteLock
+
+load_dotenv()
+COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+
+co = cohere.Client(COHERE_API_KEY)
+
+EMBED_MODEL = "embed-english-v3.0"
+EMBED_DIM = 1024
+embedding_cache = EmbeddingCache()
+
+# HNSW build and query parameters; a larger M and ef_construction give a better graph at a higher
+# memory and build cost, ef trades query speed for recall (it is never set below k)
+HNSW_M = int(os.getenv("HNSW_M", "64"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "512"))
+HNSW_EF = int(os.getenv("HNSW_EF", "64"))
+# "none" searches the float HNSW graph; "int8" or "binary" scan quantized codes instead and
+# re-score the best RESCORE_OVERSAMPLE * k candidates exactly against the float embeddings
+RETRIEVAL_QUANTIZATION = os.getenv("RETRIEVAL_QUANTIZATION", "none")
+RESCORE_OVERSAMPLE = int(os.getenv("RESCORE_OVERSAMPLE", "4"))
+
+# Dense and BM25 rankings are merged with reciprocal-rank fusion: score = sum of 1 / (RRF_K + rank)
+RRF_K = 60
+# The Cohere rerank is skipped when at least this fraction of the dense and BM25 top results
+# coincide; set it above 1 to always rerank
+RERANK_SKIP_AGREEMENT = float(os.getenv("RERANK_SKIP_AGREEMENT", "0.67"))
+
+# The index and embedding matrix grow geometrically so adding a ticker does not
+# pay for copying or resizing the whole corpus every time
+INDEX_GROWTH_FACTOR = 1.5
+INDEX_MIN_CAPACITY = 64
+
+SNAPSHOT_DIR = os.getenv("VECTORSTORE_SNAPSHOT_DIR", os.path.join("data", "vectorstore"))
+SNAPSHOT_FORMAT_VERSION = 3
+SNAPSHOTS_TO_KEEP = 2
+
+# Chunks that do not belong to a ticker (e.g. investopedia) live here
+GENERAL_NAMESPACE = "general"
+
+# Once the namespaces in memory go over this, the least recently queried tickers are evicted to disk
+VECTORSTORE_MEMORY_BUDGET_BYTES = int(os.getenv("VECTORSTORE_MEMORY_BUDGET_MB", "2048")) * 1024 ** 2
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class Namespace:
+    """
+    Chunks, embeddings, search structure and BM25 index for a single ticker (or the general corpus).
+
+    With RETRIEVAL_QUANTIZATION="none" the embeddings are searched through an HNSW
+    graph. With "int8" or "binary" no graph is built: candidates come from a scan
+    of the quantized codes and are re-scored exactly against the float matrix,
+    which is memory-mapped once the namespace has been saved.
+
+    Labels are positions in self.docs, so they never change once assigned.
+    Searches and snapshot writes hold the namespace's read lock and add() holds
+    its write lock, so a search never runs against a half-resized index.
+    """
+
+    def __init__(self, name: str, quantization: str = None):
+        self.name = name
+        self.quantization = quantization or RETRIEVAL_QUANTIZATION
+        self.docs = ChunkStore()
+        self.docs_embs = np.empty((0, EMBED_DIM), dtype=np.float32)
+        self._embs_buffer = None
+        self.idx = None
+        self.codes = None if self.quantization == "none" else QuantizedMatrix(self.quantization, EMBED_DIM)
+        self.bm25 = BM25Index()
+        self.lock = ReadWriteLock()
+        # Number of chunks already written to the current snapshot
+        self.saved_count = 0
+        # memory_bytes() as of the last add or load, tracked in the store's running total
+        self.bytes = 0
+        # Set under the write lock when the store evicts this object; later adds are refused
+        self.dropped = False
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @staticmethod
+    def _capacity_for(count: int) -> int:
+        return max(INDEX_MIN_CAPACITY, int(count * INDEX_GROWTH_FACTOR))
+
+    def _new_index(self, capacity: int) -> hnswlib.Index:
+        idx = hnswlib.Index(space="ip", dim=EMBED_DIM)
+        idx.init_index(max_elements=capacity, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        return idx
+
+    def add(self, new_docs: List[Dict[str, str]], new_embeddings: List[List[float]]) -> Optional[int]:
+        """
+        Appends chunks and inserts only their embeddings into the graph (or the quantized codes).
+        Returns how many bytes the namespace grew by, or None if it was evicted and nothing was added.
+        """
+        with self.lock.write():
+            if self.dropped:
+                return None
+            start = len(self.docs_embs)
+            end = start + len(new_embeddings)
+            self._append_embeddings(new_embeddings)
+            self.docs.extend(new_docs)
+            self.bm25.add([doc["text"] for doc in new_docs])
+
+            if self.codes is not None:
+                self.codes.append(self.docs_embs[start:end])
+            else:
+                if self.idx is None:
+                    self.idx = self._new_index(self._capacity_for(end))
+                elif end > self.idx.get_max_elements():
+                    self.idx.resize_index(self._capacity_for(end))
+                self.idx.add_items(self.docs_embs[start:end], np.arange(start, end))
+
+            previous, self.bytes = self.bytes, self.memory_bytes()
+            return self.bytes - previous
+
+    def _append_embeddings(self, new_embeddings: List[List[float]]) -> None:
+        """
+        Appends rows to the embedding matrix, growing its backing buffer geometrically.
+        """
+        count = len(self.docs_embs)
+        end = count + len(new_embeddings)
+        if self._embs_buffer is None or end > len(self._embs_buffer):
+            buffer = np.empty((self._capacity_for(end), EMBED_DIM), dtype=np.float32)
+            buffer[:count] = self.docs_embs
+            self._embs_buffer = buffer
+        self._embs_buffer[count:end] = np.asarray(new_embeddings, dtype=np.float32).reshape(-1, EMBED_DIM)
+        self.docs_embs = self._embs_buffer[:end]
+
+    def search(self, query_embs, k: int):
+        """
+        Returns (labels, distances) for each query, with at most k hits per query.
+        Distances are 1 - inner product, as hnswlib reports them.
+        """
+        if self.codes is not None:
+            return self._search_quantized(np.asarray(query_embs, dtype=np.float32), k)
+        k = min(k, self.idx.get_current_count())
+        self.idx.set_ef(max(HNSW_EF, k))
+        return self.idx.knn_query(query_embs, k=k)
+
+    def _search_quantized(self, query_embs: np.ndarray, k: int):
+        """
+        Takes the best RESCORE_OVERSAMPLE * k candidates by quantized score and re-ranks them by exact inner product.
+        """
+        count = len(self.codes)
+        k = min(k, count)
+        candidates = min(count, k * RESCORE_OVERSAMPLE)
+        scores = self.codes.scores(query_embs)
+        if candidates < count:
+            candidate_ids = np.argpartition(-scores, candidates - 1, axis=1)[:, :candidates]
+        else:
+            candidate_ids = np.broadcast_to(np.arange(count), (len(query_embs), count))
+
+        labels = np.empty((len(query_embs), k), dtype=np.uint64)
+        distances = np.empty((len(query_embs), k), dtype=np.float32)
+        for i, (query, ids) in enumerate(zip(query_embs, candidate_ids)):
+            ids = np.sort(ids)  # ascending rows read the memory-mapped matrix sequentially
+            exact = self.docs_embs[ids] @ query
+            best = np.argsort(-exact)[:k]
+            labels[i] = ids[best]
+            distances[i] = 1 - exact[best]
+        return labels, distances
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate heap held by the namespace: HNSW graph and vectors (or quantized codes),
+        the embedding buffer and the chunk store. Memory-mapped embeddings and text are file-backed and not counted.
+        """
+        index = 0
+        if self.idx is not None:
+            index = self.idx.get_max_elements() * (EMBED_DIM * 4 + self.idx.M * 2 * 4 + 16)
+        if self.codes is not None:
+            index = self.codes.nbytes
+        embeddings = self._embs_buffer.nbytes if self._embs_buffer is not None else 0
+        return index + embeddings + self.docs.memory_bytes() + self.bm25.memory_bytes()
+
+    @property
+    def dirty(self) -> bool:
+        return len(self.docs) != self.saved_count
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        if self.idx is not None:
+            self.idx.save_index(os.path.join(path, "index.bin"))
+        if self.codes is not None:
+            self.codes.save(path)
+        np.save(os.path.join(path, "embeddings.npy"), np.ascontiguousarray(self.docs_embs, dtype=np.float32))
+        self.docs.save(path)
+        self.bm25.save(path)
+        self.saved_count = len(self.docs)
+
+    @classmethod
+    def load(cls, path: str, name: str) -> "Namespace":
+        """
+        Loads a namespace with its embedding matrix and chunk text memory-mapped
+        read-only, so every worker process shares the same pages. A graph, codes or
+        BM25 index missing from the snapshot (the retrieval mode changed, or the
+        snapshot predates it) is rebuilt.
+        """
+        namespace = cls(name)
+        namespace.docs_embs = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        namespace.docs = ChunkStore.load(path)
+        count = len(namespace.docs)
+        rebuilt = False
+
+        if namespace.codes is not None:
+            if QuantizedMatrix.exists(path, namespace.quantization):
+                namespace.codes = QuantizedMatrix.load(path, namespace.quantization, EMBED_DIM)
+            else:
+                print(f"Quantizing {count} embeddings for {name}...")
+                namespace.codes.append(namespace.docs_embs)
+                rebuilt = True
+        elif os.path.exists(os.path.join(path, "index.bin")):
+            namespace.idx = hnswlib.Index(space="ip", dim=EMBED_DIM)
+            namespace.idx.load_index(os.path.join(path, "index.bin"), max_elements=cls._capacity_for(count))
+        else:
+            print(f"Building HNSW index over {count} embeddings for {name}...")
+            namespace.idx = namespace._new_index(cls._capacity_for(count))
+            namespace.idx.add_items(namespace.docs_embs, np.arange(count))
+            rebuilt = True
+
+        if BM25Index.exists(path):
+            namespace.bm25 = BM25Index.load(path)
+        else:
+            print(f"Building BM25 index over {count} chunks for {name}...")
+            namespace.bm25.add([doc["text"] for doc in namespace.docs])
+            rebuilt = True
+
+        # Rebuilt structures are not in this snapshot yet, so the namespace is written again on the next save
+        namespace.saved_count = -1 if rebuilt else count
+        namespace.bytes = namespace.memory_bytes()
+        return namespace
+
+
+class Vectorstore:
+    def __init__(
+        self,
+        documents: List[Union[Dict[str, str], str]] = None,
+        memory_budget: int = VECTORSTORE_MEMORY_BUDGET_BYTES,
+        snapshot_dir: str = SNAPSHOT_DIR,
+    ):
+        self.namespaces: Dict[str, Namespace] = {}
+        # Namespaces dropped from memory (name -> chunk count); they stay in the
+        # snapshot and are loaded again on first use
+        self.evicted: Dict[str, int] = {}
+        self.memory_budget = memory_budget
+        # Sum of Namespace.bytes over self.namespaces, adjusted as namespaces grow, load and are evicted
+        self._memory_bytes = 0
+        self._memory_lock = threading.Lock()
+        self.last_used: Dict[str, float] = {}
+        self.embedded_stocks = set()
+        # ticker -> when its last incremental refresh finished; kept in the manifest so a
+        # restart knows how far back to look for new filings
+        self.refreshed_at: Dict[str, float] = {}
+        # Where snapshots are written, including the ones taken when a namespace is evicted
+        self.snapshot_dir = snapshot_dir
+        self._snapshot_path = None
+        self.retrieve_top_k = 10
+        self.rerank_top_k = 3
+        self.reranks = 0
+        self.reranks_skipped = 0
+        self.retrieval_cache = RetrievalCache()
+        self._save_lock = threading.Lock()
+        # Serializes creating namespaces, so two ingestions of a new ticker cannot each publish their own
+        self._create_lock = threading.Lock()
+
+        if documents:
+            self.add_documents(documents)
+
+    @staticmethod
+    def prefetch(document: Union[Dict[str, str], str]) -> Optional[Future]:
+        """
+        Starts downloading a URL document's page on the shared HTTP client; returns None for other documents.
+        """
+        if isinstance(document, dict) and "url" in document:
+            return http_client.submit("GET", document["url"], headers={"User-Agent": "ks@gatech.edu"})
+        return None
+
+    def chunk_document(self, document: Union[Dict[str, str], str], page: Future = None) -> List[Dict[str, str]]:
+        """
+        Splits one document into chunks: URLs are fetched (or taken from the prefetched page)
+        and partitioned as HTML, {"title", "text"} dicts (e.g. filings) and plain strings are partitioned as text.
+        """
+        # unstructured is slow to import and only needed once documents are ingested
+        from unstructured.chunking.title import chunk_by_title
+        from unstructured.partition.html import partition_html
+        from unstructured.partition.text import partition_text
+
+        if isinstance(document, str):
+            return [{"title": "Direct Text", "text": document, "url": None}]
+        elif isinstance(document, dict) and "url" in document:
+            try:
+                response = (page or self.prefetch(document)).result()
+                response.raise_for_status()
+                elements = partition_html(text=response.text)
+                chunks = chunk_by_title(elements)
+                return [
+                    {
+                        "title": document.get("title", "Untitled"),
+                        "text": str(chunk),
+                        "url": document["url"],
+                    }
+                    for chunk in chunks
+                ]
+            except Exception as e:
+                print(f"Error loading document: {e}")
+                return []
+        elif isinstance(document, dict) and "text" in document:
+            chunks = chunk_by_title(partition_text(text=document["text"]))
+            return [
+                {
+                    "title": document.get("title", "Untitled"),
+                    "text": str(chunk),
+                    "url": None,
+                }
+                for chunk in chunks
+            ]
+        else:
+            print(f"Unsupported document format: {document}", end="\n")
+            return []
+
+    def process_documents(self, new_documents: List[Union[Dict[str, str], str]]) -> List[Dict[str, str]]:
+        """
+        Processes documents, handling both URL-based and direct text input.
+        """
+        print("Processing documents...")
+
+        # Every page download starts at once; the threads only wait for and parse them
+        pages = [self.prefetch(doc) for doc in new_documents]
+        new_docs = []
+        with ThreadPoolExecutor() as executor:
+            future_to_doc = {executor.submit(self.chunk_document, doc, page): doc for doc, page in zip(new_documents, pages)}
+
+            for future in tqdm(as_completed(future_to_doc), total=len(new_documents), desc="Processing documents"):
+                new_docs.extend(future.result())
+
+        return new_docs
+
+    def embed(self, new_docs: List[Dict[str, str]]) -> List[List[float]]:
+        """
+        Embeds the document chunks using the Cohere API, reusing cached embeddings.
+        """
+        print("Embedding document chunks...")
+
+        texts = [item["text"] for item in new_docs]
+        return embed_texts(co, embedding_cache, texts, model=EMBED_MODEL, input_type="search_document")
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embeds search queries, reusing cached embeddings for queries seen before.
+        """
+        return np.asarray(
+            embed_texts(co, embedding_cache, queries, model=EMBED_MODEL, input_type="search_query"), dtype=np.float32
+        )
+
+    def add_documents(self, new_documents: List[Union[Dict[str, str], str]], namespace: str = GENERAL_NAMESPACE) -> None:
+        """
+        Adds new documents to a namespace, embedding and indexing only the new chunks.
+        """
+        if not new_documents:
+            return
+        new_docs = self.process_documents(new_documents)
+        if not new_docs:
+            return
+        new_embeddings = self.embed(new_docs)
+
+        print(f"Indexing document chunks into {namespace}...")
+        self.add_chunks(new_docs, new_embeddings, namespace)
+
+        print(f"Indexing complete with {len(self.namespaces[namespace])} document chunks in {namespace}.")
+
+    def add_chunks(self, new_docs: List[Dict[str, str]], new_embeddings: List[List[float]], namespace: str = GENERAL_NAMESPACE) -> None:
+        """
+        Indexes already embedded chunks; they are searchable as soon as this returns.
+        """
+        while True:
+            ns = self.namespace(namespace)
+            if ns is None:
+                with self._create_lock:
+                    ns = self.namespace(namespace)
+                    if ns is None:
+                        ns = Namespace(namespace)
+                        ns.add(new_docs, new_embeddings)
+                        # Only published once its index exists
+                        self.namespaces[namespace] = ns
+                        self.last_used[namespace] = time.time()
+                        self._track_memory(ns.bytes)
+                        break
+            grown = ns.add(new_docs, new_embeddings)
+            if grown is not None:
+                self._track_memory(grown)
+                break
+            # Evicted between the lookup and the add; load it back from the snapshot and add there
+        self.enforce_memory_budget(keep=namespace)
+
+    def has_namespace(self, name: str) -> bool:
+        return name in self.namespaces or name in self.evicted
+
+    def namespace(self, name: str) -> Optional[Namespace]:
+        """
+        Returns a namespace, loading it back from the snapshot if it was evicted.
+        """
+        loaded = False
+        if name in self.evicted:
+            with self._save_lock:
+                if name in self.evicted:
+                    print(f"Loading evicted namespace {name}...")
+                    ns = Namespace.load(os.path.join(self._snapshot_path, "namespaces", name), name)
+                    self.namespaces[name] = ns
+                    self._track_memory(ns.bytes)
+                    del self.evicted[name]
+                    loaded = True
+        if name in self.namespaces:
+            self.last_used[name] = time.time()
+        if loaded:
+            self.enforce_memory_budget(keep=name)
+        return self.namespaces.get(name)
+
+    def _track_memory(self, delta: int) -> None:
+        with self._memory_lock:
+            self._memory_bytes += delta
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate heap held by the namespaces in memory, kept as a running total.
+        """
+        return self._memory_bytes
+
+    def enforce_memory_budget(self, keep: str = None) -> List[str]:
+        """
+        Evicts the least recently used ticker namespaces until memory is back under budget.
+        The general corpus and `keep` (the namespace just used) are never evicted.
+        """
+        evicted = []
+        if self.memory_bytes() <= self.memory_budget:
+            return evicted
+        candidates = sorted(
+            (name for name in list(self.namespaces) if name not in (GENERAL_NAMESPACE, keep)),
+            key=lambda name: self.last_used.get(name, 0),
+        )
+        for name in candidates:
+            if self.memory_bytes() <= self.memory_budget:
+                break
+            if self.evict(name):
+                evicted.append(name)
+        return evicted
+
+    def evict(self, name: str) -> bool:
+        """
+        Drops a namespace from memory, first writing a snapshot if it has unsaved chunks.
+        A namespace with chunks being added is left in memory.
+        """
+        with self._save_lock:
+            ns = self.namespaces.get(name)
+            if ns is None or ns.lock.writers_waiting or ns.lock.writing:
+                return False
+            if ns.dirty or self._snapshot_path is None:
+                self._save(self.snapshot_dir)
+            with ns.lock.write():
+                # Chunks added while the snapshot was written are not in it yet
+                if ns.dirty:
+                    return False
+                ns.dropped = True
+                del self.namespaces[name]
+                self.evicted[name] = len(ns)
+                self._track_memory(-ns.bytes)
+        print(f"Evicted namespace {name} from memory.")
+        return True
+
+    def _search(self, queries: List[str], query_embs, namespace: str = None) -> List[tuple]:
+        """
+        Returns (hits, agreed) for each query: the top (Namespace, doc_id) hits after
+        fusing the dense and BM25 rankings, and whether the two rankings agree closely
+        enough on the top results to skip the rerank.
+
+        With a known namespace only that ticker's indexes are searched; otherwise
+        every namespace in memory is searched and the hits are merged.
+        """
+        if self.has_namespace(namespace):
+            namespaces = [self.namespace(namespace)]
+        else:
+            namespaces = list(self.namespaces.values())
+            now = time.time()
+            for ns in namespaces:
+                self.last_used[ns.name] = now
+        namespaces = [ns for ns in namespaces if len(ns)]
+
+        dense = [[] for _ in range(len(queries))]
+        lexical = [[] for _ in range(len(queries))]
+        for ns in namespaces:
+            with ns.lock.read():
+                labels, distances = ns.search(query_embs, k=self.retrieve_top_k)
+                lexical_results = [ns.bm25.search(query, self.retrieve_top_k) for query in queries]
+            for query_hits, query_labels, query_distances in zip(dense, labels, distances):
+                query_hits.extend((distance, ns.name, int(label), ns) for label, distance in zip(query_labels, query_distances))
+            for query_hits, (doc_ids, scores) in zip(lexical, lexical_results):
+                query_hits.extend((-score, ns.name, int(doc_id), ns) for doc_id, score in zip(doc_ids, scores))
+
+        results = []
+        for dense_hits, lexical_hits in zip(dense, lexical):
+            dense_ranked = [(ns, doc_id) for _, _, doc_id, ns in sorted(dense_hits, key=lambda hit: hit[:3])[: self.retrieve_top_k]]
+            lexical_ranked = [(ns, doc_id) for _, _, doc_id, ns in sorted(lexical_hits, key=lambda hit: hit[:3])[: self.retrieve_top_k]]
+            results.append((self._fuse(dense_ranked, lexical_ranked), self._agree(dense_ranked, lexical_ranked)))
+        return results
+
+    def _fuse(self, *rankings: List[tuple]) -> List[tuple]:
+        """
+        Reciprocal-rank fusion of several (Namespace, doc_id) rankings; ties keep the order of the first ranking.
+        """
+        fused = {}
+        for ranking in rankings:
+            for rank, (ns, doc_id) in enumerate(ranking, start=1):
+                key = (ns.name, doc_id)
+                if key not in fused:
+                    fused[key] = [0.0, len(fused), ns, doc_id]
+                fused[key][0] += 1 / (RRF_K + rank)
+        best = sorted(fused.values(), key=lambda entry: (-entry[0], entry[1]))
+        return [(ns, doc_id) for _, _, ns, doc_id in best[: self.retrieve_top_k]]
+
+    def _agree(self, dense_ranked: List[tuple], lexical_ranked: List[tuple]) -> bool:
+        top_dense = {(ns.name, doc_id) for ns, doc_id in dense_ranked[: self.rerank_top_k]}
+        top_lexical = {(ns.name, doc_id) for ns, doc_id in lexical_ranked[: self.rerank_top_k]}
+        if not top_dense or not top_lexical:
+            return False
+        return len(top_dense & top_lexical) / self.rerank_top_k >= RERANK_SKIP_AGREEMENT
+
+    def _rerank(self, query: str, hits: List[tuple]) -> List[tuple]:
+        """
+        Reranks one query's fused hits with Cohere and returns the top (Namespace, doc_id) pairs.
+        """
+        if not hits:
+            return []
+
+        rank_fields = ["title", "text"]
+
+        docs_to_rerank = [ns.docs[doc_id] for ns, doc_id in hits]
+        rerank_results = co.rerank(
+            query=query,
+            documents=docs_to_rerank,
+            top_n=self.rerank_top_k,
+            model="rerank-english-v3.0",
+            rank_fields=rank_fields
+        )
+
+        return [hits[result.index] for result in rerank_results.results]
+
+    def version(self, namespace: str = None) -> tuple:
+        """
+        Changes whenever chunks are added to what a search of `namespace` covers (every loaded namespace if None).
+        """
+        if namespace is not None:
+            count = self.evicted.get(namespace)
+            return (namespace, count if count is not None else len(self.namespaces[namespace]))
+        return tuple(sorted((name, len(ns)) for name, ns in list(self.namespaces.items())))
+
+    def retrieve_many(self, queries: List[str], namespace: str = None) -> List[Dict[str, str]]:
+        """
+        Retrieves document chunks for several queries at once.
+
+        Results are cached per normalized query and namespace version, so only
+        uncached queries are searched. Those are embedded in one request and
+        searched with one batched knn_query plus BM25. Queries whose dense and
+        BM25 results agree take the fused top results directly; the rest are
+        reranked concurrently. Chunks returned for more than one query are only
+        included once, with a score summing their reciprocal ranks across queries.
+        """
+        if not queries or not self.namespaces:
+            return []
+
+        scope = namespace if self.has_namespace(namespace) else None
+        version = self.version(scope)
+        keys = [(normalize_query(query), version) for query in queries]
+        results_per_query = [self.retrieval_cache.get(key) for key in keys]
+        missing = [i for i, results in enumerate(results_per_query) if results is None]
+
+        if missing:
+            start = time.perf_counter()
+            missing_queries = [queries[i] for i in missing]
+            query_embs = self.embed_queries(missing_queries)
+            searched = self._search(missing_queries, query_embs, scope)
+
+            def rank(query, result):
+                hits, agreed = result
+                if agreed:
+                    self.reranks_skipped += 1
+                    return hits[: self.rerank_top_k]
+                self.reranks += 1
+                return self._rerank(query, hits)
+
+            with ThreadPoolExecutor(max_workers=len(missing_queries)) as executor:
+                reranked_per_query = list(executor.map(rank, missing_queries, searched))
+
+            compute_seconds = (time.perf_counter() - start) / len(missing)
+            for i, reranked in zip(missing, reranked_per_query):
+                results = [((ns.name, doc_id), ns.docs[doc_id]) for ns, doc_id in reranked]
+                self.retrieval_cache.put(keys[i], results, compute_seconds)
+                results_per_query[i] = results
+
+        docs_retrieved = {}
+        for results in results_per_query:
+            for rank, (key, doc) in enumerate(results, start=1):
+                if key not in docs_retrieved:
+                    docs_retrieved[key] = {
+                        "title": doc["title"],
+                        "text": doc["text"],
+                        "url": doc.get("url"),
+                        "score": 0.0,
+                    }
+                docs_retrieved[key]["score"] += 1 / rank
+
+        return list(docs_retrieved.values())
+
+    def stats(self) -> dict:
+        return {
+            "retrieval_cache": self.retrieval_cache.stats(),
+            "reranks": self.reranks,
+            "reranks_skipped": self.reranks_skipped,
+        }
+
+    def retrieve(self, query: str, namespace: str = None) -> List[Dict[str, str]]:
+        """
+        Retrieves document chunks based on the given query, restricted to a ticker's namespace if given.
+        """
+        return self.retrieve_many([query], namespace)
+
+    def save(self, snapshot_dir: str = None) -> str:
+        """
+        Writes a versioned snapshot of every namespace (index, embeddings, chunks) and the embedded stocks,
+        to the store's snapshot directory unless another one is given (which then becomes the store's).
+
+        Each snapshot goes to its own directory and the CURRENT file is only
+        switched over once it is fully written, so readers never see a partial snapshot.
+        """
+        with self._save_lock:
+            if snapshot_dir is not None:
+                self.snapshot_dir = snapshot_dir
+            return self._save(self.snapshot_dir)
+
+    def _save(self, snapshot_dir: str) -> str:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        versions = self._snapshot_versions(snapshot_dir)
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:06d}"
+        tmp_path = os.path.join(snapshot_dir, f".{version}.tmp")
+        os.makedirs(tmp_path, exist_ok=True)
+        print(f"Saving vectorstore snapshot {version}...")
+
+        # Namespaces unchanged since the previous snapshot (including evicted ones) are hard-linked from it
+        # Each namespace is written under its read lock, so its count and files agree even while chunks are being added
+        counts = {}
+        for name, ns in list(self.namespaces.items()):
+            with ns.lock.read():
+                if not len(ns):
+                    continue
+                counts[name] = len(ns)
+                if ns.dirty or not self._link_namespace(name, tmp_path):
+                    ns.save(os.path.join(tmp_path, "namespaces", name))
+        for name, count in list(self.evicted.items()):
+            self._link_namespace(name, tmp_path)
+            counts[name] = count
+        with open(os.path.join(tmp_path, "manifest.json"), "w") as f:
+            json.dump({
+                "format_version": SNAPSHOT_FORMAT_VERSION,
+                "embed_model": EMBED_MODEL,
+                "dim": EMBED_DIM,
+                "version": version,
+                "namespaces": counts,
+                "embedded_stocks": sorted(self.embedded_stocks),
+                "refreshed_at": dict(self.refreshed_at),
+            }, f)
+
+        os.rename(tmp_path, os.path.join(snapshot_dir, version))
+        with open(os.path.join(snapshot_dir, "CURRENT.tmp"), "w") as f:
+            f.write(version)
+        os.replace(os.path.join(snapshot_dir, "CURRENT.tmp"), os.path.join(snapshot_dir, "CURRENT"))
+        self._snapshot_path = os.path.join(snapshot_dir, version)
+
+        # Only the newest snapshots are kept; older ones may still be mapped by running workers
+        for old_version in self._snapshot_versions(snapshot_dir)[:-SNAPSHOTS_TO_KEEP]:
+            shutil.rmtree(os.path.join(snapshot_dir, old_version), ignore_errors=True)
+
+        print(f"Snapshot {version} saved with {sum(counts.values())} document chunks.")
+        return version
+
+    def _link_namespace(self, name: str, tmp_path: str) -> bool:
+        """
+        Hard-links a namespace's files from the previous snapshot (copying across filesystems).
+        """
+        if self._snapshot_path is None:
+            return False
+        source = os.path.join(self._snapshot_path, "namespaces", name)
+        if not os.path.isdir(source):
+            return False
+        shutil.copytree(source, os.path.join(tmp_path, "namespaces", name), copy_function=_link_or_copy)
+        return True
+
+    @classmethod
+    def load(cls, snapshot_dir: str = SNAPSHOT_DIR) -> "Vectorstore":
+        """
+        Loads the current snapshot, memory-mapping each namespace's embedding matrix.
+        """
+        with open(os.path.join(snapshot_dir, "CURRENT")) as f:
+            version = f.read().strip()
+        path = os.path.join(snapshot_dir, version)
+
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        if manifest["format_version"] != SNAPSHOT_FORMAT_VERSION or manifest["embed_model"] != EMBED_MODEL:
+            raise ValueError(f"Snapshot {version} is incompatible with this version of the Vectorstore")
+
+        print(f"Loading vectorstore snapshot {version}...")
+        vectorstore = cls(snapshot_dir=snapshot_dir)
+        # Namespaces that do not fit in the memory budget start out evicted and load on first use
+        names = sorted(manifest["namespaces"], key=lambda name: name != GENERAL_NAMESPACE)
+        for name in names:
+            if vectorstore.memory_bytes() > vectorstore.memory_budget:
+                vectorstore.evicted[name] = manifest["namespaces"][name]
+                continue
+            ns = vectorstore.namespaces[name] = Namespace.load(os.path.join(path, "namespaces", name), name)
+            vectorstore._track_memory(ns.bytes)
+        vectorstore.embedded_stocks = set(manifest["embedded_stocks"])
+        vectorstore.refreshed_at = manifest.get("refreshed_at", {})
+        vectorstore._snapshot_path = path
+
+        print(f"Loaded {sum(manifest['namespaces'].values())} document chunks for {len(vectorstore.embedded_stocks)} stocks.")
+        return vectorstore
+
+    @staticmethod
+    def _snapshot_versions(snapshot_dir: str) -> List[str]:
+        return sorted(name for name in os.listdir(snapshot_dir) if name.startswith("v") and name[1:].isdigit())
+
+    @staticmethod
+    def has_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> bool:
+        return os.path.exists(os.path.join(snapshot_dir, "CURRENT"))